@@ -0,0 +1,154 @@
+# client_roundtrip.py
+#
+# Throughput and latency of the suggest -> evaluate -> report cycle, measured
+# against a local stand-in for the tinker endpoints (wwu_tinker.server backed
+# by an in-memory LocalClient) so that only client and HTTP overhead is timed.
+#
+#   python benchmarks/client_roundtrip.py --out bench_results.json
+#
+# Every scenario varies one of worker count, order_size, number of variables
+# or history size and writes one JSON record with configs/sec and p50/p99
+# latency in milliseconds.
+
+import argparse
+import asyncio
+import json
+import platform
+import threading
+import time
+
+import numpy as np
+from aiohttp import web
+
+from wwu_tinker.client import Client
+from wwu_tinker.experiment import Experiment
+from wwu_tinker.local import LocalClient
+from wwu_tinker.server import make_app
+
+
+def start_server():
+    """Serves the tinker endpoints from an in-memory backend on a free port."""
+    loop = asyncio.new_event_loop()
+    runner = web.AppRunner(make_app(LocalClient(seed=0)))
+    loop.run_until_complete(runner.setup())
+    site = web.TCPSite(runner, "127.0.0.1", 0, backlog=4096)
+    loop.run_until_complete(site.start())
+    port = runner.addresses[0][1]
+    threading.Thread(target=loop.run_forever, daemon=True).start()
+    return "http://127.0.0.1:%d/" % port
+
+
+def make_experiment(url, n_vars, workers):
+    expt = Experiment("bench", client=Client(url, pool_size=max(workers, 1)))
+    expt.data["vars"] = {"x%d" % i: {"type": "float", "range": [-1.0, 1.0]}
+                         for i in range(n_vars)}
+    expt.submit()
+    return expt
+
+
+def objective(config):
+    return sum(v * v for v in config.data["config"].values())
+
+
+def summarize(name, params, latencies, n_configs, elapsed):
+    latencies = np.asarray(latencies) * 1000.0
+    return {"scenario": name, "params": params,
+            "configs": n_configs, "seconds": elapsed,
+            "configs_per_sec": n_configs / elapsed,
+            "p50_ms": float(np.percentile(latencies, 50)),
+            "p99_ms": float(np.percentile(latencies, 99))}
+
+
+def bench_cycle(url, workers, order_size, n_vars, n_configs):
+    """Each worker fetches order_size configs, evaluates and reports them."""
+    expt = make_experiment(url, n_vars, workers)
+    per_worker = max(n_configs // (workers * order_size), 1)
+    latencies = [[] for _ in range(workers)]
+
+    def worker(i):
+        for _ in range(per_worker):
+            start = time.perf_counter()
+            configs = expt.next_configurations(order_size)
+            if order_size == 1:
+                configs[0].report_loss(objective(configs[0]))
+            else:
+                expt.report_losses([(c, objective(c)) for c in configs])
+            latencies[i].append(time.perf_counter() - start)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(workers)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+    expt.client.close()
+    return summarize("cycle",
+                     {"workers": workers, "order_size": order_size,
+                      "n_vars": n_vars},
+                     [l for ls in latencies for l in ls],
+                     workers * per_worker * order_size, elapsed)
+
+
+def bench_history(url, history_size, n_vars, repeats):
+    """Full history download versus an incremental sync of one new result."""
+    expt = make_experiment(url, n_vars, 1)
+    configs = expt.next_configurations(history_size)
+    for start in range(0, history_size, 1000):
+        expt.report_losses([(c, objective(c)) for c in configs[start:start + 1000]])
+    expt.get_history()
+
+    full, delta = [], []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        expt.get_evaluation_history()
+        full.append(time.perf_counter() - start)
+        config = expt.next_configuration()
+        config.report_loss(objective(config))
+        start = time.perf_counter()
+        expt.get_history()
+        delta.append(time.perf_counter() - start)
+    expt.client.close()
+    params = {"history_size": history_size, "n_vars": n_vars}
+    return [summarize("history_full", params, full, repeats, sum(full)),
+            summarize("history_sync", params, delta, repeats, sum(delta))]
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark the tinker client round-trip loop")
+    parser.add_argument("--out", default="bench_results.json",
+                        help="File the JSON results are written to")
+    parser.add_argument("--configs", type=int, default=2000,
+                        help="Configurations per cycle scenario")
+    parser.add_argument("--quick", action="store_true",
+                        help="Run a reduced matrix, e.g. for CI")
+    args = parser.parse_args()
+
+    workers = [1, 4] if args.quick else [1, 4, 16, 64]
+    order_sizes = [1, 16] if args.quick else [1, 4, 16, 64]
+    n_vars = [2, 32] if args.quick else [2, 8, 32, 128]
+    history_sizes = [1000] if args.quick else [1000, 10000, 100000]
+
+    cycles = ([(w, 1, 2) for w in workers] + [(1, s, 2) for s in order_sizes]
+              + [(1, 1, d) for d in n_vars])
+    url = start_server()
+    results = []
+    for w, size, d in sorted(set(cycles), key=cycles.index):
+        results.append(bench_cycle(url, w, size, d, args.configs))
+    for h in history_sizes:
+        results.extend(bench_history(url, h, 2, 20))
+
+    for r in results:
+        print("%-13s %-45s %10.1f configs/s  p50 %8.2f ms  p99 %8.2f ms"
+              % (r["scenario"], json.dumps(r["params"]), r["configs_per_sec"],
+                 r["p50_ms"], r["p99_ms"]))
+    with open(args.out, "w") as f:
+        json.dump({"python": platform.python_version(),
+                   "machine": platform.machine(),
+                   "time": time.time(),
+                   "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
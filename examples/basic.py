@@ -22,6 +22,10 @@ for i in range(10):
         print (result)
         config.report_loss(result)
 
+# cost_function works on NumPy arrays too, so it can evaluate a whole batch
+# of configurations in one call, with one report per batch.
+test_experiment.run_batch(lambda batch: cost_function(batch['x'], batch['y']),
+                          n_trials=100)
 
 print(experiment_id)
 
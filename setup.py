@@ -14,5 +14,10 @@ setup(name='wwu_tinker',
       packages=['wwu_tinker'],
       install_requires=[
           'requests',
+          'numpy',
       ],
+      extras_require={
+          'async': ['aiohttp'],
+          'server': ['aiohttp'],
+      },
       zip_safe=False)
@@ -0,0 +1,96 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("aiohttp")
+
+from aiohttp import web
+
+from wwu_tinker.aio import AsyncClient, AsyncExperiment
+from wwu_tinker.journal import Journal
+from wwu_tinker.local import LocalClient
+from wwu_tinker.server import make_app
+from wwu_tinker.variable import Variable
+
+
+def _serve(test):
+    # Runs test(experiment, backend) against a local server
+    async def main():
+        backend = LocalClient(seed=0)
+        runner = web.AppRunner(make_app(backend))
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        host, port = runner.addresses[0][:2]
+        expt = AsyncExperiment(test.__name__,
+                               client=AsyncClient("http://%s:%d" % (host, port)))
+        expt.add_var(Variable(test.__name__ + "_x", "float", v_range=[0.0, 1.0]))
+        try:
+            await expt.submit()
+            await test(expt, backend)
+        finally:
+            await expt.close()
+            await runner.cleanup()
+    asyncio.run(main())
+
+
+def _completed(expt, backend):
+    return backend.experiments[expt.experiment_id]["completed"]
+
+
+def test_run():
+    async def run(expt, backend):
+        async def objective(config):
+            await asyncio.sleep(0.01)
+            return config["run_x"]
+
+        results = await expt.run(objective, n_trials=7, workers=3)
+        results += await expt.run(lambda config: 1.0, n_trials=2)
+        assert len(results) == len(_completed(expt, backend)) == 9
+    _serve(run)
+
+
+def test_run_batch():
+    async def run_batch(expt, backend):
+        results = await expt.run_batch(lambda batch: batch["run_batch_x"] * 2,
+                                       n_trials=10, batch_size=4)
+        assert len(results) == len(_completed(expt, backend)) == 10
+    _serve(run_batch)
+
+
+def test_prefetch():
+    async def prefetch(expt, backend):
+        seen = []
+        async for config in expt.prefetch(queue_size=3, n_configs=5):
+            await config.report_loss(0.5)
+            seen.append(config.get_eval_id())
+        assert len(set(seen)) == len(_completed(expt, backend)) == 5
+    _serve(prefetch)
+
+
+def test_heartbeat_keeps_the_lease():
+    async def heartbeat(expt, backend):
+        expt.set_lease(0.3)
+        config = await expt.next_configuration()
+        with config.heartbeat(interval=0.05):
+            await asyncio.sleep(0.6)
+            assert await expt.recover_expired() == []
+        await asyncio.sleep(0.4)
+        assert [c.get_eval_id() for c in await expt.recover_expired()] == \
+            [config.get_eval_id()]
+    _serve(heartbeat)
+
+
+def test_journal(tmp_path):
+    async def journal(expt, backend):
+        expt.attach_journal(Journal(str(tmp_path / "journal.jsonl")))
+        configs = await expt.next_configurations(3)
+        await expt.report_losses([(c, 1.0) for c in configs[:2]])
+        assert expt.journal.pending() == []
+
+        resumed = AsyncExperiment(client=expt.client)
+        unfinished = await resumed.resume(Journal(str(tmp_path / "journal.jsonl")))
+        assert [c.get_eval_id() for c in unfinished] == [configs[2].get_eval_id()]
+        await unfinished[0].report_loss(2.0)
+        assert len(_completed(expt, backend)) == 3
+    _serve(journal)
@@ -0,0 +1,60 @@
+import json
+import random
+
+import pytest
+
+from wwu_tinker.client import iter_json_array
+
+
+def _value(rng, depth=0):
+    kind = rng.randrange(8 if depth < 3 else 6)
+    if kind == 0:
+        return rng.randint(-10 ** 6, 10 ** 6)
+    if kind == 1:
+        return rng.choice([0.5, -1e-7, 3.25e12, 1e300, -0.0, rng.random()])
+    if kind == 2:
+        return "".join(rng.choice('ab ,]}[{"\\\né中') for _ in range(rng.randrange(6)))
+    if kind == 3:
+        return rng.choice([True, False])
+    if kind == 4:
+        return None
+    if kind == 5:
+        return rng.randint(0, 9)
+    if kind == 6:
+        return [_value(rng, depth + 1) for _ in range(rng.randrange(4))]
+    return {"k%d" % i: _value(rng, depth + 1) for i in range(rng.randrange(4))}
+
+
+def _chunks(text, rng):
+    cuts = sorted(rng.sample(range(1, len(text)), min(len(text) - 1,
+                                                      rng.randrange(1, 12))))
+    return [text[i:j] for i, j in zip([0] + cuts, cuts + [len(text)])]
+
+
+@pytest.mark.parametrize("seed", range(200))
+def test_random_chunks_match_json_loads(seed):
+    rng = random.Random(seed)
+    array = [_value(rng) for _ in range(rng.randrange(8))]
+    text = json.dumps(array, indent=rng.choice([None, 1]),
+                      ensure_ascii=rng.random() < 0.5)
+    assert list(iter_json_array(_chunks(text, rng) if len(text) > 1 else [text])) \
+        == json.loads(text)
+
+
+def test_every_split_point():
+    text = json.dumps([12, -3.5e-2, "a,]b", {"x": [1, 2]}, True, None, 1234567])
+    for i in range(len(text) + 1):
+        assert list(iter_json_array([text[:i], text[i:]])) == json.loads(text)
+    assert list(iter_json_array(text)) == json.loads(text)
+
+
+def test_other_bodies():
+    assert list(iter_json_array(['{"evaluations": [1, ', '2]}'])) == [1, 2]
+    assert list(iter_json_array(['{"eval_id": 3}'])) == [{"eval_id": 3}]
+    assert list(iter_json_array([" ", ""])) == []
+
+
+@pytest.mark.parametrize("text", ['[1, 2', '[{"a": 1}', '[12'])
+def test_truncated_array(text):
+    with pytest.raises(ValueError):
+        list(iter_json_array([text]))
@@ -0,0 +1,19 @@
+import pytest
+
+from wwu_tinker.configuration import Configuration
+
+SCHEMA = {"opt": {"type": "enum", "values": ["sgd", "adam"]},
+          "beta": {"type": "float", "range": [0.0, 1.0],
+                   "parent": "opt", "parent_values": ["adam"]}}
+
+
+def test_getitem():
+    config = Configuration({"config": {"opt": "sgd"}}, schema=SCHEMA)
+    assert config["opt"] == "sgd"
+    assert config["beta"] is None
+    assert config.beta is None
+    with pytest.raises(KeyError):
+        config["gamma"]
+    with pytest.raises(AttributeError):
+        config.gamma
+    assert config.get("gamma", 1) == 1
@@ -0,0 +1,52 @@
+import itertools
+
+import pytest
+
+from wwu_tinker.grid import Grid
+
+VARIABLES = {"a": {"type": "int", "range": [0, 2]},
+             "b": {"type": "enum", "values": ["x", "y"]},
+             "c": {"type": "float", "range": [0.0, 1.0], "step_size": 0.5}}
+
+
+def _product():
+    return [{"a": a, "b": b, "c": c}
+            for a, b, c in itertools.product([0, 1, 2], ["x", "y"],
+                                             [0.0, 0.5, 1.0])]
+
+
+def test_grid_matches_product():
+    grid = Grid(VARIABLES)
+    assert len(grid) == grid.count == 18
+    assert list(grid) == _product()
+    assert [grid[i] for i in range(len(grid))] == _product()
+    assert grid.batch(5, 11) == _product()[5:11]
+
+
+@pytest.mark.parametrize("contiguous", [False, True])
+def test_shards_cover_the_grid_once(contiguous):
+    grid = Grid(VARIABLES)
+    shards = [list(grid.shard(w, 4, contiguous=contiguous)) for w in range(4)]
+    merged = [c for shard in shards for c in shard]
+    assert sorted(map(repr, merged)) == sorted(map(repr, _product()))
+
+
+def test_slices_match_product():
+    grid = Grid(VARIABLES)
+    for key in [slice(3, None), slice(None, None, -1), slice(2, 17, 5),
+                slice(20, 30)]:
+        assert list(grid[key]) == _product()[key]
+        assert grid[key].count == len(_product()[key])
+
+
+def test_huge_grid():
+    variables = {"v%02d" % i: {"type": "int", "range": [0, 99]}
+                 for i in range(12)}
+    grid = Grid(variables)
+    assert grid.count == 100 ** 12
+    with pytest.raises(OverflowError):
+        len(grid)
+    last = grid.shard(3, 4, contiguous=True)
+    assert last.count == 100 ** 12 // 4
+    assert next(iter(last)) == grid.config(3 * 100 ** 12 // 4)
+    assert grid[-1] == {name: 99 for name in variables}
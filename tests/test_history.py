@@ -0,0 +1,88 @@
+import math
+
+import numpy as np
+
+from wwu_tinker.experiment import Experiment
+from wwu_tinker.history import History
+from wwu_tinker.local import LocalClient
+from wwu_tinker.variable import Variable
+
+
+def _records(configs):
+    return [{"config": config, "result": float(i)}
+            for i, config in enumerate(configs)]
+
+
+def test_extend_infers_columns_from_every_record():
+    configs = [{"opt": "sgd", "lr": 0.1},
+               {"opt": "adam", "lr": 0.01, "beta": 0.9},
+               {"opt": "sgd", "lr": 0.2, "layers": 3}]
+    history = History.from_records(_records(configs))
+
+    assert history.names == ["beta", "layers", "lr", "opt"]
+    assert history.conditional == {"beta", "layers"}
+    assert [history[i]["config"] for i in range(3)] == configs
+    assert math.isnan(history.column("beta")[0])
+
+
+def test_later_rows_may_drop_or_add_keys():
+    history = History()
+    history.append({"opt": "adam", "beta": 0.9, "units": 4}, 1.0)
+    history.append({"opt": "sgd"}, 0.5)
+    history.extend(_records([{"opt": "sgd", "units": 8, "drop": True}]))
+
+    assert history.conditional == {"beta", "drop", "units"}
+    assert history[0]["config"] == {"opt": "adam", "beta": 0.9, "units": 4}
+    assert history[1]["config"] == {"opt": "sgd"}
+    assert history[2]["config"] == {"opt": "sgd", "units": 8, "drop": True}
+    assert history.best()["config"] == {"opt": "sgd", "units": 8, "drop": True}
+
+
+def test_inferred_types_widen():
+    history = History()
+    history.append({"x": 1, "y": 2}, 0.0)
+    history.append({"x": 1.5, "y": "big"}, 1.0)
+
+    assert history.column("x").dtype == np.float64
+    assert [history[i]["config"] for i in range(2)] == [{"x": 1.0, "y": 2},
+                                                         {"x": 1.5, "y": "big"}]
+
+
+def test_schema_is_not_inferred():
+    variables = {"lr": {"type": "float", "range": [0.0, 1.0]},
+                 "opt": {"type": "enum", "values": ["sgd", "adam"]}}
+    history = History(variables)
+    history.extend(_records([{"lr": 0.5, "opt": "adam"}]))
+
+    assert history.conditional == set()
+    assert history[0]["config"] == {"lr": 0.5, "opt": "adam"}
+
+
+def _experiment(client, name):
+    expt = Experiment(name, client=client)
+    expt.add_var(Variable(name + "_x", "float", v_range=[0.0, 1.0]))
+    expt.submit()
+    return expt
+
+
+def test_history_cache_is_shared_and_sees_own_reports():
+    client = LocalClient(seed=0)
+    expt = _experiment(client, "shared_cache")
+    for loss in [3.0, 2.0]:
+        expt.next_configuration().report_loss(loss)
+    history = expt.get_history()
+
+    config = expt.next_configuration()
+    config.report_loss(1.0)
+    assert expt.get_best_evaluation(cached=True)["result"] == 1.0
+    expt.report_configuration({"shared_cache_x": 0.5}, 0.5)
+
+    again = Experiment(expt_id=expt.experiment_id, client=client)
+    assert again.history_cache.get(again) is history
+    assert again.get_best_evaluation(cached=True)["result"] == 0.5
+    assert len(again.get_history()) == 4
+    assert again.get_best_evaluation(cached=True)["result"] == 0.5
+
+    other = _experiment(LocalClient(seed=0), "shared_cache_other")
+    assert other.experiment_id == expt.experiment_id
+    assert other.history_cache.get(other) is None
@@ -0,0 +1,31 @@
+import json
+
+from wwu_tinker.optimizers import make_optimizer
+
+
+def _key(config):
+    return json.dumps(config, sort_keys=True)
+
+
+def test_bayesian_does_not_repeat_at_a_boundary_optimum():
+    variables = {"x": {"type": "float", "range": [0.0, 1.0]},
+                 "y": {"type": "float", "range": [0.0, 1.0]}}
+    optimizer = make_optimizer("bayesian", variables, seed=0)
+    seen = set()
+    for _ in range(60):
+        config = optimizer.ask(1)[0]
+        assert _key(config) not in seen
+        seen.add(_key(config))
+        optimizer.tell(config, -config["x"] - config["y"])
+
+
+def test_bayesian_covers_a_discrete_space_before_repeating():
+    variables = {"a": {"type": "int", "range": [0, 9]},
+                 "b": {"type": "enum", "values": ["p", "q", "r"]}}
+    optimizer = make_optimizer("bayesian", variables, seed=0)
+    configs = []
+    while len(configs) < 30:
+        for config in optimizer.ask(2):
+            configs.append(_key(config))
+            optimizer.tell(config, -config["a"] + (config["b"] == "q"))
+    assert len(set(configs)) == 30
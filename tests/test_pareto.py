@@ -0,0 +1,71 @@
+import itertools
+import random
+
+import numpy as np
+import pytest
+
+from wwu_tinker.pareto import ParetoFront, hypervolume, hypervolume_improvement
+
+
+def _dominates(a, b):
+    return all(x <= y for x, y in zip(a, b)) and a != b
+
+
+def _brute_front(points):
+    return {p for p in points if not any(_dominates(q, p) for q in points)}
+
+
+def _brute_hypervolume(points, reference):
+    # Integer coordinates: count the unit cells some point dominates
+    return sum(any(all(p[k] <= c[k] for k in range(len(c))) for p in points)
+               for c in itertools.product(*[range(r) for r in reference]))
+
+
+def _points(rng, d, n):
+    return [tuple(rng.randrange(6) for _ in range(d)) for _ in range(n)]
+
+
+@pytest.mark.parametrize("d", [2, 3, 4])
+@pytest.mark.parametrize("seed", range(20))
+def test_front_matches_brute_force(d, seed):
+    rng = random.Random(seed)
+    points = _points(rng, d, rng.randrange(1, 40))
+    names = ["m%d" % k for k in range(d)]
+    front = ParetoFront(names)
+    for p in points:
+        front.add(dict(zip(names, p)))
+    found = [tuple(r[name] for name in names) for r in front.front()]
+    assert len(found) == len(set(found))
+    assert set(found) == _brute_front(points)
+    for p in _points(rng, d, 10):
+        assert front.dominated(dict(zip(names, p))) == \
+            any(all(x <= y for x, y in zip(q, p)) for q in points)
+    if d == 2:
+        assert found == sorted(found)
+
+
+@pytest.mark.parametrize("d", [1, 2, 3])
+@pytest.mark.parametrize("seed", range(20))
+def test_hypervolume_matches_brute_force(d, seed):
+    rng = random.Random(seed)
+    points = _points(rng, d, rng.randrange(0, 15))
+    reference = [5] * d
+    expected = _brute_hypervolume(points, reference)
+    assert hypervolume(np.array(points, dtype=float), reference) == expected
+
+    front = np.array(sorted(_brute_front(points)), dtype=float)
+    candidates = _points(rng, d, 8)
+    gains = hypervolume_improvement(front, np.array(candidates, dtype=float),
+                                    reference)
+    for candidate, gain in zip(candidates, gains):
+        assert gain == _brute_hypervolume(points + [candidate], reference) - expected
+
+
+def test_maximized_objectives():
+    front = ParetoFront(["loss", "accuracy"], maximize=["accuracy"])
+    for loss, accuracy in [(1, 0.5), (2, 0.9), (2, 0.4), (0.5, 0.2), (3, 0.9)]:
+        front.add({"loss": loss, "accuracy": accuracy})
+    assert [(r["loss"], r["accuracy"]) for r in front.front()] == \
+        [(0.5, 0.2), (1, 0.5), (2, 0.9)]
+    assert front.hypervolume({"loss": 3, "accuracy": 0}) == \
+        pytest.approx(2.5 * 0.2 + 2 * 0.3 + 1 * 0.4)
@@ -0,0 +1,96 @@
+import requests
+
+from wwu_tinker.experiment import Experiment
+from wwu_tinker.journal import Journal
+from wwu_tinker.local import LocalClient
+from wwu_tinker.variable import Variable
+
+
+def _http_error(status):
+    response = requests.Response()
+    response.status_code = status
+    return requests.HTTPError("%d error" % status, response=response)
+
+
+class FlakyClient(LocalClient):
+    # Answers like LocalClient, but refuses report_batch and fails the
+    # "report" calls listed in errors, by eval_id
+    def __init__(self, errors):
+        super().__init__(seed=0)
+        self.errors = errors
+        self.reported = []
+
+    def request(self, endpoint, payload):
+        if endpoint == "report_batch":
+            raise _http_error(404)
+        if endpoint == "report" and payload["eval_id"] in self.errors:
+            raise self.errors[payload["eval_id"]]
+        if endpoint == "report":
+            self.reported.append(payload["eval_id"])
+        return super().request(endpoint, payload)
+
+
+def _experiment(client, name):
+    expt = Experiment(name, client=client)
+    expt.add_var(Variable(name + "_x", "float", v_range=[0.0, 1.0]))
+    expt.submit()
+    return expt
+
+
+class CountingClient(LocalClient):
+    def __init__(self):
+        super().__init__(seed=0)
+        self.told = []
+
+    def _tell(self, expt, evaluation):
+        self.told.append(evaluation["result"])
+        super()._tell(expt, evaluation)
+
+
+def test_duplicate_reports_are_told_once():
+    client = CountingClient()
+    expt = _experiment(client, "duplicate_reports")
+    config = expt.next_configuration()
+    config.report_loss(1.0)
+    config.report_loss(1.0)
+    expt.report_losses([(config, 2.0)])
+
+    stored = client.experiments[expt.experiment_id]
+    assert len(stored["completed"]) == 1
+    assert client.told == [1.0]
+
+
+def test_fallback_marks_each_report_sent(tmp_path):
+    client = FlakyClient({})
+    expt = _experiment(client, "fallback_reports")
+    configs = expt.next_configurations(4)
+    journal = Journal(str(tmp_path / "journal.jsonl"))
+    expt.attach_journal(journal)
+    client.errors[configs[2].get_eval_id()] = requests.ConnectionError()
+
+    expt.report_losses([(c, 0.5) for c in configs])
+
+    assert journal.sent == {c.get_eval_id() for c in configs[:2]}
+    assert [e["eval_id"] for e in journal.pending()] == \
+        [c.get_eval_id() for c in configs[2:]]
+
+    del client.errors[configs[2].get_eval_id()]
+    assert expt.replay_journal() == 2
+    assert journal.pending() == []
+    assert client.reported == [c.get_eval_id() for c in configs]
+
+
+def test_rejected_reports_are_dropped(tmp_path, capsys):
+    client = FlakyClient({})
+    expt = _experiment(client, "rejected_reports")
+    configs = expt.next_configurations(3)
+    journal = Journal(str(tmp_path / "journal.jsonl"))
+    expt.attach_journal(journal)
+    client.errors[configs[0].get_eval_id()] = _http_error(422)
+    client.errors[configs[1].get_eval_id()] = requests.Timeout()
+
+    expt.report_losses([(c, 0.5) for c in configs])
+
+    assert [e["eval_id"] for e in journal.pending()] == \
+        [c.get_eval_id() for c in configs[1:]]
+    assert "rejected" in capsys.readouterr().out
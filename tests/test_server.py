@@ -0,0 +1,62 @@
+import pytest
+
+pytest.importorskip("aiohttp")
+
+from wwu_tinker.experiment import Experiment
+from wwu_tinker.server import SQLiteBackend
+from wwu_tinker.variable import Variable
+
+
+def _variables(prefix):
+    return [Variable(prefix + "_a", "int", v_range=[1, 9]),
+            Variable(prefix + "_b", "float", v_range=[0.0, 1.0])]
+
+
+def _experiment(client, optimizer, variables):
+    expt = Experiment(variables[0].name, client=client)
+    expt.add_vars(variables)
+    if optimizer == "hyperband":
+        expt.set_optimizer(optimizer, resource=variables[0].name)
+    else:
+        expt.set_optimizer(optimizer)
+    expt.submit()
+    return expt
+
+
+def _run(expt, n_trials):
+    configs = []
+    for _ in range(n_trials):
+        config = expt.next_configuration()
+        configs.append(dict(config._values))
+        config.report_loss(sum(float(v) for v in config._values.values()))
+    return configs
+
+
+@pytest.mark.parametrize("optimizer", ["grid", "random", "latin_hyper",
+                                       "bayesian", "hyperband"])
+def test_restart_continues_the_sequence(tmp_path, optimizer):
+    variables = _variables("restart_" + optimizer)
+    with SQLiteBackend(str(tmp_path / "reference.db"), seed=0) as backend:
+        expected = _run(_experiment(backend, optimizer, variables), 12)
+
+    path = str(tmp_path / "restarted.db")
+    with SQLiteBackend(path, seed=0) as backend:
+        expt = _experiment(backend, optimizer, variables)
+        configs = _run(expt, 7)
+        expt_id = expt.experiment_id
+    with SQLiteBackend(path, seed=0) as backend:
+        expt = Experiment(expt_id=expt_id, client=backend)
+        configs += _run(expt, 5)
+
+    assert configs == expected
+
+
+def test_restart_does_not_reissue_unreported_configurations(tmp_path):
+    path = str(tmp_path / "tinker.db")
+    with SQLiteBackend(path, seed=0) as backend:
+        expt = _experiment(backend, "grid", _variables("restart_pending"))
+        pending = expt.next_configuration()
+        expt_id = expt.experiment_id
+    with SQLiteBackend(path, seed=0) as backend:
+        expt = Experiment(expt_id=expt_id, client=backend)
+        assert expt.next_configuration()._values != pending._values
@@ -0,0 +1,46 @@
+import multiprocessing
+
+from wwu_tinker.experiment import Experiment
+from wwu_tinker.shared import FileClient
+from wwu_tinker.variable import Variable
+
+
+def _worker(args):
+    path, optimizer, n_trials = args
+    expt = Experiment("shared_" + optimizer, client=FileClient(path, seed=0))
+    expt.add_vars([Variable("shared_a", "int", v_range=[0, 9]),
+                   Variable("shared_b", "enum", values=["p", "q", "r", "s"])])
+    expt.set_optimizer(optimizer)
+    expt.submit()
+    issued = []
+    for _ in range(n_trials):
+        config = expt.next_configuration()
+        if config is None:
+            break
+        issued.append((config.get_eval_id(), config["shared_a"], config["shared_b"]))
+        config.report_loss(config["shared_a"])
+    return expt.experiment_id, issued
+
+
+def _run(path, optimizer, n_workers, n_trials):
+    ctx = multiprocessing.get_context("spawn")
+    with ctx.Pool(n_workers) as pool:
+        return pool.map(_worker, [(path, optimizer, n_trials)] * n_workers)
+
+
+def test_processes_get_unique_evaluations(tmp_path):
+    results = _run(str(tmp_path), "random", 4, 25)
+    assert len({expt_id for expt_id, _ in results}) == 1
+    eval_ids = [eval_id for _, issued in results for eval_id, _, _ in issued]
+    assert len(eval_ids) == len(set(eval_ids)) == 100
+
+    client = FileClient(str(tmp_path))
+    client.request("request_history", {"expt_id": results[0][0]})
+    assert sorted(client.experiments[results[0][0]]["evaluations"]) == sorted(eval_ids)
+
+
+def test_processes_split_a_grid(tmp_path):
+    results = _run(str(tmp_path), "grid", 3, 20)
+    configs = [(a, b) for _, issued in results for _, a, b in issued]
+    assert sorted(configs) == sorted((a, b) for a in range(10)
+                                     for b in ["p", "q", "r", "s"])
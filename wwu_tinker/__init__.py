@@ -1,5 +1,8 @@
 import json
+import os
 import requests
 import traceback
 
-server = "http://tinker.cs.wwu.edu:6060/"
+# Default server for every Experiment; override with TINKER_SERVER or
+# per Experiment with server=...
+server = os.environ.get("TINKER_SERVER", "http://tinker.cs.wwu.edu:6060/")
@@ -0,0 +1,920 @@
+import asyncio
+import inspect
+import json
+import time
+import traceback
+
+import aiohttp
+import numpy as np
+
+from .__init__ import server
+from .configuration import Configuration, to_structured
+from .experiment import Experiment, unpack_configurations
+from .history import History, _infer_variables, shared_cache
+from .pareto import ParetoFront
+
+
+class AsyncClient:
+    instrumentation = None
+
+    def __init__(self, server_url=server, pool_size=100, timeout=30,
+                 retries=3, backoff_factor=0.3, status_forcelist=()):
+
+        """
+        Creates a shared aiohttp connection pool for talking to the tinker
+        server from an event loop. The underlying session is opened lazily
+        on the first request so the Client can be built outside of a
+        running loop.
+
+        Like Client, only failures to connect are retried, since the
+        endpoints are not idempotent.
+
+        Args:
+            server_url (str): Base URL of the tinker server
+            pool_size (int): Maximum number of simultaneous connections
+            timeout (float): Total seconds to wait for a single request
+            retries (int): Number of times to retry a request that could
+                           not connect
+            backoff_factor (float): Base delay for exponential backoff between retries
+            status_forcelist (tuple): HTTP status codes that trigger a retry.
+                                      Only list codes the server answers
+                                      without acting on the request.
+        """
+
+        self.server = server_url if server_url.endswith("/") else server_url + "/"
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff_factor = backoff_factor
+        self.status_forcelist = status_forcelist
+        self.session = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, tb):
+        await self.close()
+
+    def _get_session(self):
+        if self.session is None or self.session.closed:
+            connector = aiohttp.TCPConnector(limit=self.pool_size)
+            self.session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=self.timeout))
+        return self.session
+
+    async def request(self, endpoint, payload):
+
+        """
+        POSTs a JSON payload to one of the server endpoints over the
+        shared connection pool, retrying with exponential backoff.
+
+        Args:
+            endpoint (str): Name of the endpoint, e.g. "request" or "report"
+            payload (JSON/dict): Body of the request
+
+        Returns:
+            JSON/dict: Decoded response body, or None if the body was not JSON
+        """
+
+        if self.instrumentation is None:
+            return await self._post(endpoint, payload)
+        start = time.time()
+        try:
+            response = await self._post(endpoint, payload)
+        except Exception:
+            self.instrumentation.record(endpoint, start, time.time(), error=True)
+            raise
+        self.instrumentation.record(endpoint, start, time.time())
+        return response
+
+    async def _post(self, endpoint, payload):
+        session = self._get_session()
+        for attempt in range(self.retries + 1):
+            try:
+                async with session.post(self.server + endpoint,
+                                        json=payload) as r:
+                    if (r.status not in self.status_forcelist
+                            or attempt == self.retries):
+                        r.raise_for_status()
+                        try:
+                            return await r.json(content_type=None)
+                        except ValueError:
+                            return None
+            except aiohttp.ClientConnectorError:
+                if attempt == self.retries:
+                    raise
+            await asyncio.sleep(self.backoff_factor * (2 ** attempt))
+
+    async def stream(self, endpoint, payload):
+
+        """
+        POSTs a JSON payload and iterates over the elements of the list in
+        the response. The server is asked for newline-delimited JSON, which
+        is decoded line by line as it arrives; any other response is
+        decoded whole.
+
+        Args:
+            endpoint (str): Name of the endpoint, e.g. "request_history"
+            payload (JSON/dict): Body of the request
+
+        Yields:
+            JSON/dict: Each element of the response
+        """
+
+        start = time.time()
+        error = True
+        session = self._get_session()
+        try:
+            async with session.post(self.server + endpoint, json=payload,
+                                    headers={"Accept": "application/x-ndjson, "
+                                                       "application/json"}) as r:
+                r.raise_for_status()
+                if r.content_type == "application/x-ndjson":
+                    async for line in r.content:
+                        if line.strip():
+                            yield json.loads(line)
+                else:
+                    body = await r.json(content_type=None)
+                    if isinstance(body, dict):
+                        body = body.get("evaluations", [body] if body else [])
+                    for element in body:
+                        yield element
+            error = False
+        finally:
+            if self.instrumentation is not None:
+                self.instrumentation.record(endpoint, start, time.time(),
+                                            error=error)
+
+    async def close(self):
+
+        """
+        Closes every pooled connection held by this Client.
+        """
+
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+
+def _rejected(error):
+    # A 4xx response: sending the same request again cannot succeed
+    return (isinstance(error, aiohttp.ClientResponseError)
+            and 400 <= error.status < 500)
+
+
+class AsyncHeartbeat:
+    def __init__(self, configuration, lease, interval=None):
+
+        """
+        Task on the running event loop that keeps the lease of an
+        in-flight AsyncConfiguration alive by posting to the "heartbeat"
+        endpoint, like lease.Heartbeat does from a thread.
+
+        Args:
+            configuration (AsyncConfiguration): Configuration being evaluated
+            lease (float): Seconds each heartbeat extends the lease by
+            interval (float): Seconds between heartbeats, a third of the
+                              lease if None
+        """
+
+        self.configuration = configuration
+        self.lease = lease
+        self.interval = interval if interval is not None else lease / 3.0
+        self._task = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, tb):
+        self.stop()
+
+    async def _run(self):
+        payload = {"expt_id": self.configuration.data.get("expt_id"),
+                   "eval_id": self.configuration.get_eval_id(),
+                   "lease": self.lease}
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.configuration._client.request("heartbeat", payload)
+            except Exception:
+                traceback.print_exc()
+                print("Error: heartbeat for evaluation %s failed"
+                      % payload["eval_id"])
+
+    def start(self):
+
+        """
+        Starts sending heartbeats, unless they were already started. Must
+        be called from a running event loop.
+
+        Returns:
+            AsyncHeartbeat: self
+        """
+
+        if self._task is None:
+            self._task = asyncio.ensure_future(self._run())
+        return self
+
+    def stop(self):
+
+        """
+        Stops sending heartbeats.
+        """
+
+        if self._task is not None:
+            self._task.cancel()
+
+
+class AsyncConfiguration(Configuration):
+    __slots__ = ()
+
+    def __init__(self, config_json, client=None, pruner=None, lease=None,
+                 journal=None, schema=None, space=None):
+
+        """
+        Creates a new Configuration whose server calls are coroutines.
+
+        Args:
+            config_json (JSON/dict): raw configuration JSON returned by the server
+            client (AsyncClient): Connection pool used to report back to the
+                                  server. A new AsyncClient is created if none
+                                  is given.
+            pruner (Pruner): Early-stopping rule consulted by should_stop
+            lease (float): Seconds the server holds this configuration for
+                           between heartbeats, if it was leased
+            journal (Journal): Write-ahead log the loss is recorded in
+                               before it is sent
+            schema (dict): The experiment's variables, as in its "vars" JSON
+            space (SearchSpace): The schema compiled, shared by the
+                                 experiment's configurations
+        """
+
+        super().__init__(config_json,
+                         client=client if client is not None else AsyncClient(),
+                         pruner=pruner, lease=lease, journal=journal,
+                         schema=schema, space=space)
+
+    async def report_loss(self, loss):
+
+        """
+        Adds a loss value to this configuration and returns it to the server.
+
+        Args:
+            loss (float): Loss generated by running a model with this configuration
+        """
+
+        try:
+            loss = float(loss)
+        except ValueError:
+            traceback.print_stack()
+            print("Error: reported loss must be a parsable float")
+            return
+        self.data["result"] = loss
+        if self._journal is not None:
+            self._journal.record_report(self.data)
+        settled = True
+        try:
+            await self._client.request("report", self.data)
+            shared_cache.record(self._client, [self.data])
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            if _rejected(e):
+                print("Error: the server rejected the loss of evaluation %s, "
+                      "it is dropped (%s)" % (self.get_eval_id(), e))
+            elif self._journal is None:
+                raise
+            else:
+                print("Warning: could not reach the server, the loss of "
+                      "evaluation %s stays in the journal" % self.get_eval_id())
+                settled = False
+        if settled and self._journal is not None:
+            self._journal.mark_sent([self.get_eval_id()])
+        if self._heartbeat is not None:
+            self._heartbeat.stop()
+
+    def heartbeat(self, interval=None):
+
+        """
+        Starts a task on the running event loop that renews this
+        configuration's lease until its loss is reported. Can be used as
+        a context manager around the objective:
+
+            with config.heartbeat():
+                loss = await train(config)
+
+        Args:
+            interval (float): Seconds between heartbeats, a third of the
+                              lease if None
+
+        Returns:
+            AsyncHeartbeat: The running heartbeat, or None if the
+                            configuration was not leased
+        """
+
+        if self._lease is None:
+            print("Error: this configuration was not leased, see Experiment.set_lease")
+            return None
+        if self._heartbeat is None:
+            self._heartbeat = AsyncHeartbeat(self, self._lease, interval).start()
+        return self._heartbeat
+
+    async def report_metrics(self, metrics, objective=None):
+
+        """
+        Reports several metrics of this configuration at once, one of them
+        as the loss, see Configuration.report_metrics.
+
+        Args:
+            metrics (dict): Maps metric names to parsable floats
+            objective (str): Metric reported as the loss
+        """
+
+        report = super().report_metrics(metrics, objective=objective)
+        if report is not None:
+            await report
+
+
+class AsyncExperiment(Experiment):
+    def __init__(self, name="Experiment", load_fn=None,
+                 optimizer="random", expt_id=None, client=None, server=None):
+
+        """
+        Initialize a new experiment whose server calls are coroutines. All
+        Configurations it hands out share one AsyncClient, so many of them
+        can be in flight at once from a single event loop.
+
+        run, run_batch, prefetch, replay_journal and resume are coroutines
+        or async iterators here too, and leased configurations send their
+        heartbeats from a task on the event loop.
+
+        Args:
+            name (str): The name of the Experiment to be created
+            load_fn (str): Name of the file in which Experiment JSON is saved
+            optimizer (str): Name of the optimizer that the
+                             user would like to use. This can be set later.
+            expt_id (str) : ID of already initialized experiment
+            client (AsyncClient): Shared connection pool. A new AsyncClient is
+                                  created if none is given.
+            server (str): URL of the tinker server used when no client is given
+        """
+
+        if client is None:
+            client = AsyncClient() if server is None else AsyncClient(server_url=server)
+        super().__init__(name=name, load_fn=load_fn, optimizer=optimizer,
+                         expt_id=expt_id, client=client)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, tb):
+        await self.close()
+
+    def _make_configuration(self, config_json):
+        if self.journal is not None:
+            self.journal.record_issue(config_json)
+        return AsyncConfiguration(config_json, client=self.client,
+                                  pruner=self.pruner, lease=self.lease,
+                                  journal=self.journal,
+                                  schema=self._data["vars"] or None,
+                                  space=self._compiled_space())
+
+    async def submit(self):
+
+        """
+        Sends the Experiment JSON to the server to be inserted into
+        the database.
+
+        Returns:
+            str: ID corresponding to the server-side experiment
+        """
+
+        response_json = await self.client.request("setup", self._data)
+        self.experiment_id = str(response_json["expt_id"])
+        if self.journal is not None:
+            self.journal.record_experiment(self.experiment_id)
+        return self.experiment_id
+
+    async def next_configuration(self, order_size=1):
+
+        """
+        Requests the next configuration for evaluation from the server.
+        Use next_configurations to retrieve several at once.
+
+        Args:
+            order_size (int): Must be 1; kept for backwards compatibility
+
+        Returns:
+            AsyncConfiguration: Hyperparameter values for all variables
+                                in the experiment, or None once the
+                                optimizer has run out
+        """
+
+        if order_size != 1:
+            print("Error: next_configuration returns one configuration, use "
+                  "next_configurations(%s) for more" % order_size)
+            return None
+        payload = self._request_payload(1)
+        response_json = await self.client.request("request", payload)
+        configs = unpack_configurations(response_json)
+        if not configs:
+            return None
+        return self._make_configuration(configs[0])
+
+    async def next_configurations(self, n):
+
+        """
+        Requests a batch of configurations for evaluation from the server
+        in as few round trips as possible.
+
+        Args:
+            n (int): Number of configurations to be retrieved
+
+        Returns:
+            list: Up to n AsyncConfiguration objects
+        """
+
+        configs = []
+        while len(configs) < n:
+            payload = self._request_payload(n - len(configs))
+            response_json = await self.client.request("request", payload)
+            batch = unpack_configurations(response_json)
+            if not batch:
+                break
+            configs.extend(self._make_configuration(c) for c in batch)
+        return configs[:n]
+
+    async def next_batch(self, n):
+
+        """
+        Requests n configurations and packs their values into a structured
+        array, see Experiment.next_batch.
+
+        Args:
+            n (int): Number of configurations to request
+
+        Returns:
+            tuple: (list of AsyncConfiguration objects, structured np.ndarray
+                   with one row per configuration)
+        """
+
+        configs = await self.next_configurations(n)
+        schema, conditional = self._data["vars"], ()
+        if not schema and configs:
+            schema, conditional = _infer_variables(
+                [c._values for c in configs])
+        return configs, to_structured(configs, schema, conditional)
+
+    async def report_batch(self, configurations, losses):
+
+        """
+        Reports a vector of losses, one per configuration, in one bulk call.
+
+        Args:
+            configurations (list): AsyncConfiguration objects from next_batch
+            losses (array-like): Loss of each configuration, in the same order
+        """
+
+        losses = np.asarray(losses, dtype=np.float64).ravel()
+        if len(losses) != len(configurations):
+            print("Error: got %d losses for %d configurations"
+                  % (len(losses), len(configurations)))
+            return
+        await self.report_losses(zip(configurations, losses.tolist()))
+
+    async def recover_expired(self):
+
+        """
+        Asks the server to re-issue every configuration whose lease ran
+        out without a reported loss.
+
+        Returns:
+            list: AsyncConfiguration objects to evaluate again
+        """
+
+        payload = {"expt_id": self.experiment_id, "lease": self.lease}
+        response_json = await self.client.request("recover", payload)
+        return [self._make_configuration(c)
+                for c in unpack_configurations(response_json)]
+
+    async def report_losses(self, results):
+
+        """
+        Reports the losses of many configurations to the server in one POST,
+        see Experiment.report_losses.
+
+        Args:
+            results (list): (AsyncConfiguration, loss) pairs
+        """
+
+        try:
+            results = [(config, float(loss)) for config, loss in results]
+        except ValueError:
+            traceback.print_stack()
+            print("Error: reported loss must be a parsable float")
+            return
+        for config, loss in results:
+            config.data["result"] = loss
+        evaluations = [config.data for config, _ in results]
+
+        if self.journal is None:
+            await self._send_evaluations(evaluations)
+            return
+        for evaluation in evaluations:
+            if self.journal.reported.get(evaluation["eval_id"]) is not evaluation:
+                self.journal.record_report(evaluation)
+        try:
+            await self._send_evaluations(evaluations)
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            pending = [e for e in evaluations
+                       if e["eval_id"] not in self.journal.sent]
+            print("Warning: could not reach the server, %d losses stay in "
+                  "the journal" % len(pending))
+
+    async def _send_evaluations(self, evaluations):
+        # See Experiment._send_evaluations; the fallback reports are sent
+        # concurrently, and each one is settled as it completes.
+        if self._batch_reports:
+            payload = {"expt_id": self.experiment_id,
+                       "evaluations": evaluations}
+            try:
+                await self.client.request("report_batch", payload)
+                self.history_cache.record(self.client, evaluations)
+                self._mark_sent(evaluations)
+                return
+            except aiohttp.ClientResponseError as e:
+                if not _rejected(e):
+                    raise
+                if e.status == 404:
+                    self._batch_reports = False
+        errors = await asyncio.gather(*[self._send_evaluation(evaluation)
+                                        for evaluation in evaluations],
+                                      return_exceptions=True)
+        for error in errors:
+            if error is not None:
+                raise error
+
+    async def _send_evaluation(self, evaluation):
+        try:
+            await self.client.request("report", evaluation)
+            self.history_cache.record(self.client, [evaluation])
+        except aiohttp.ClientResponseError as e:
+            if not _rejected(e):
+                raise
+            print("Error: the server rejected the loss of evaluation %s, "
+                  "it is dropped (%s)" % (evaluation["eval_id"], e))
+        self._mark_sent([evaluation])
+
+    async def replay_journal(self, batch_size=500):
+
+        """
+        Sends every loss in the journal that has not reached the server
+        yet, batch_size at a time.
+
+        Returns:
+            int: Number of losses sent
+        """
+
+        pending = self.journal.pending()
+        for start in range(0, len(pending), batch_size):
+            await self._send_evaluations(pending[start:start + batch_size])
+        return len(pending)
+
+    async def resume(self, journal):
+
+        """
+        Continues a run from its journal, see Experiment.resume.
+
+        Args:
+            journal (Journal): Journal of the interrupted run
+
+        Returns:
+            list: AsyncConfiguration objects that still need a loss
+        """
+
+        if self.experiment_id is None:
+            self.experiment_id = journal.expt_id
+        self.attach_journal(journal)
+        try:
+            await self.replay_journal()
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            print("Warning: could not reach the server, pending losses stay "
+                  "in the journal")
+        return [AsyncConfiguration(e, client=self.client, pruner=self.pruner,
+                                   lease=self.lease, journal=self.journal,
+                                   schema=self._data["vars"] or None,
+                                   space=self._compiled_space())
+                for e in journal.unfinished()]
+
+    async def prefetch(self, queue_size=4, n_configs=None):
+
+        """
+        Iterates over configurations fetched ahead of time by a task on
+        the event loop, so the objective never waits on the server:
+
+            async for config in expt.prefetch():
+                await config.report_loss(await train(config))
+
+        Configurations still queued when the iteration stops were issued
+        by the server but are never evaluated.
+
+        Args:
+            queue_size (int): Number of configurations to keep ready
+            n_configs (int): Total number of configurations to hand out.
+                             Iterates until stopped if None.
+
+        Yields:
+            AsyncConfiguration: The next configuration to evaluate
+        """
+
+        configs = asyncio.Queue(maxsize=queue_size)
+
+        async def fetch():
+            fetched = 0
+            try:
+                while n_configs is None or fetched < n_configs:
+                    size = max(1, queue_size - configs.qsize())
+                    if n_configs is not None:
+                        size = min(size, n_configs - fetched)
+                    batch = await self.next_configurations(size)
+                    for config in batch:
+                        await configs.put(config)
+                    fetched += len(batch)
+                    if len(batch) < size:
+                        break
+            except Exception as error:
+                await configs.put(error)
+                return
+            await configs.put(None)
+
+        fetcher = asyncio.ensure_future(fetch())
+        try:
+            while True:
+                config = await configs.get()
+                if config is None:
+                    break
+                if isinstance(config, Exception):
+                    raise config
+                yield config
+        finally:
+            fetcher.cancel()
+
+    async def _evaluate(self, objective, config):
+        start = time.time()
+        try:
+            if inspect.iscoroutinefunction(objective):
+                loss = await objective(config)
+            else:
+                loss = await asyncio.get_running_loop().run_in_executor(
+                    None, objective, config)
+        except Exception:
+            if self.instrumentation is not None:
+                self.instrumentation.record("objective", start, time.time(),
+                                            error=True)
+            raise
+        if self.instrumentation is not None:
+            self.instrumentation.record("objective", start, time.time())
+        return loss
+
+    async def run(self, objective, n_trials=None, workers=1, time_budget=None):
+
+        """
+        Runs the fetch, evaluate and report loop for this Experiment on
+        the event loop, see Experiment.run. Up to workers evaluations are
+        in flight at once, each as its own task; a coroutine function
+        objective is awaited, any other callable runs in the loop's
+        default executor so it does not block the loop.
+
+        Args:
+            objective (callable): Takes an AsyncConfiguration and returns
+                                  its loss
+            n_trials (int): Maximum number of configurations to evaluate
+            workers (int): Number of evaluations to run at once
+            time_budget (float): Seconds after which no new trials are started
+
+        Returns:
+            list: (AsyncConfiguration, loss) pairs in the order they finished
+        """
+
+        if n_trials is None and time_budget is None:
+            print("Error: must provide n_trials or time_budget")
+            return []
+
+        deadline = None if time_budget is None else time.time() + time_budget
+        results = []
+        running = {}
+        started = 0
+        exhausted = False
+        while True:
+            free = workers - len(running)
+            if n_trials is not None:
+                free = min(free, n_trials - started)
+            if deadline is not None and time.time() >= deadline:
+                free = 0
+            if free > 0 and not exhausted:
+                configs = await self.next_configurations(free)
+                exhausted = len(configs) < free
+                for config in configs:
+                    started += 1
+                    if self.lease is not None:
+                        config.heartbeat()
+                    task = asyncio.ensure_future(self._evaluate(objective, config))
+                    running[task] = config
+            if not running:
+                if free > 0 and not exhausted:
+                    continue
+                break
+            done, _ = await asyncio.wait(running,
+                                         return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                config = running.pop(task)
+                try:
+                    loss = task.result()
+                except Exception:
+                    traceback.print_exc()
+                    print("Error: objective failed on evaluation %s"
+                          % config.get_eval_id())
+                    if config._heartbeat is not None:
+                        config._heartbeat.stop()
+                    continue
+                await config.report_loss(loss)
+                results.append((config, loss))
+        return results
+
+    async def run_batch(self, objective, n_trials=None, batch_size=64,
+                        time_budget=None):
+
+        """
+        Runs the fetch, evaluate and report loop for this Experiment a
+        whole batch at a time, see Experiment.run_batch. A coroutine
+        function objective is awaited.
+
+        Args:
+            objective (callable): Takes a structured array with one row per
+                                  configuration and returns a loss per row
+            n_trials (int): Maximum number of configurations to evaluate
+            batch_size (int): Number of configurations per objective call
+            time_budget (float): Seconds after which no new batches are started
+
+        Returns:
+            list: (AsyncConfiguration, loss) pairs in the order they were
+                  evaluated
+        """
+
+        if n_trials is None and time_budget is None:
+            print("Error: must provide n_trials or time_budget")
+            return []
+
+        deadline = None if time_budget is None else time.time() + time_budget
+        results = []
+        while n_trials is None or len(results) < n_trials:
+            if deadline is not None and time.time() >= deadline:
+                break
+            size = batch_size
+            if n_trials is not None:
+                size = min(size, n_trials - len(results))
+            configs, batch = await self.next_batch(size)
+            if not configs:
+                break
+            start = time.time()
+            try:
+                losses = objective(batch)
+                if inspect.isawaitable(losses):
+                    losses = await losses
+                losses = np.asarray(losses, dtype=np.float64).ravel()
+            except Exception:
+                if self.instrumentation is not None:
+                    self.instrumentation.record("objective", start, time.time(),
+                                                error=True)
+                traceback.print_exc()
+                print("Error: objective failed on a batch of %d configurations"
+                      % len(configs))
+                break
+            if self.instrumentation is not None:
+                self.instrumentation.record("objective", start, time.time())
+            if len(losses) != len(configs):
+                print("Error: objective returned %d losses for %d configurations"
+                      % (len(losses), len(configs)))
+                break
+            batch_results = list(zip(configs, losses.tolist()))
+            await self.report_losses(batch_results)
+            results.extend(batch_results)
+            if len(configs) < size:
+                break
+        return results
+
+    async def get_evaluation_history(self):
+
+        """
+        Requests a list of all complete evaluations from the server.
+
+        Returns:
+            List of JSON's: Containing each configuration and the matching result.
+        """
+
+        payload = {"expt_id": self.experiment_id}
+        return await self.client.request("request_history", payload)
+
+    async def stream_history(self, consumer=None, chunk_size=1024):
+
+        """
+        Downloads every complete evaluation and feeds it to consumer
+        chunk_size evaluations at a time, see Experiment.stream_history.
+
+        Args:
+            consumer: Anything with an extend(records) method. A new
+                      History if None.
+            chunk_size (int): Number of evaluations passed to each extend call
+
+        Returns:
+            The consumer
+        """
+
+        if consumer is None:
+            consumer = History(self._data["vars"] or None)
+        payload = {"expt_id": self.experiment_id}
+        chunk = []
+        async for evaluation in self.client.stream("request_history", payload):
+            chunk.append(evaluation)
+            if len(chunk) == chunk_size:
+                consumer.extend(chunk)
+                chunk = []
+        consumer.extend(chunk)
+        return consumer
+
+    async def get_pareto_front(self, objectives, maximize=(), chunk_size=1024):
+
+        """
+        Finds the evaluations that no other evaluation beats on every
+        objective, see Experiment.get_pareto_front.
+
+        Args:
+            objectives (list): Metric names, e.g. ["loss", "latency_ms"]
+            maximize (tuple): Names of the objectives where larger is better
+            chunk_size (int): Number of evaluations read at a time
+
+        Returns:
+            ParetoFront: The front; front() lists its evaluations
+        """
+
+        return await self.stream_history(
+            ParetoFront(objectives, maximize=maximize), chunk_size=chunk_size)
+
+    async def get_history(self):
+
+        """
+        Returns every complete evaluation as typed columns, only
+        downloading evaluations completed since the previous call, see
+        Experiment.get_history.
+
+        Returns:
+            History: Columnar view of every evaluation
+        """
+
+        return await self.history_cache.async_sync(self)
+
+    async def get_best_evaluation(self, cached=False):
+
+        """
+        Requests the best evaluation so far from the server.
+
+        Args:
+            cached (bool): Answer from the history cached by get_history
+                           and the losses reported from this process
+                           since, without contacting the server. The
+                           history is synced first if it was never fetched.
+
+        Returns:
+            JSON/dict: Contains best configuration and matching result.
+        """
+
+        if cached:
+            if self.history_cache.get(self) is None:
+                await self.get_history()
+            return self.history_cache.best(self)
+        payload = {"expt_id": self.experiment_id}
+        return await self.client.request("request_best_eval", payload)
+
+    async def report_configuration(self, configuration, result):
+
+        """
+        Reports hand-tuned configurations and losses.
+
+        Args:
+            configuration (dict): Hyperparameter values that were evaluated
+            result (float): Loss produced by the configuration
+        """
+
+        payload = dict({"expt_id": self.experiment_id,
+                        "config": configuration,
+                        "result": result})
+        response = await self.client.request("report_config", payload)
+        self.history_cache.record(self.client, [payload])
+        return response
+
+    async def close(self):
+
+        """
+        Closes the connection pool shared by this Experiment.
+        """
+
+        await self.client.close()
@@ -0,0 +1,159 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+
+
+def config_key(config):
+
+    """
+    Hashes a config dict into a stable key. Keys are sorted so that the
+    same hyperparameters always produce the same key.
+
+    Args:
+        config (dict): Config dict mapping variable names to values
+
+    Returns:
+        str: Hex SHA-256 digest of the canonical JSON
+    """
+
+    canonical = json.dumps(config, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class EvaluationCache:
+    def __init__(self, path, max_entries=None, max_age=None):
+
+        """
+        On-disk memo of losses keyed by the hash of Configuration.data["config"].
+        Lets a configuration that was already evaluated, in this run or an
+        earlier one, be reported without running the objective again.
+        Entries are stored in SQLite and evicted least recently used first
+        once there are more than max_entries, or once older than max_age.
+
+        Args:
+            path (str): SQLite database file, created if missing
+            max_entries (int): Maximum number of entries to keep, unbounded if None
+            max_age (float): Seconds after which an entry expires, never if None
+        """
+
+        self.path = path
+        self.max_entries = max_entries
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("CREATE TABLE IF NOT EXISTS evaluations ("
+                         "key TEXT PRIMARY KEY, config TEXT, loss REAL, "
+                         "created REAL, accessed REAL)")
+        self._db.execute("CREATE INDEX IF NOT EXISTS evaluations_accessed "
+                         "ON evaluations (accessed)")
+        self._db.commit()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        self.close()
+
+    def __len__(self):
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM evaluations").fetchone()[0]
+
+    def get(self, config):
+
+        """
+        Looks up the loss of a config dict.
+
+        Args:
+            config (dict): Config dict mapping variable names to values
+
+        Returns:
+            float: The cached loss, or None on a miss or an expired entry
+        """
+
+        key = config_key(config)
+        now = time.time()
+        with self._lock:
+            row = self._db.execute("SELECT loss, created FROM evaluations "
+                                   "WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            if self.max_age is not None and now - row[1] > self.max_age:
+                self._db.execute("DELETE FROM evaluations WHERE key = ?", (key,))
+                self._db.commit()
+                return None
+            self._db.execute("UPDATE evaluations SET accessed = ? "
+                             "WHERE key = ?", (now, key))
+            self._db.commit()
+            return row[0]
+
+    def put(self, config, loss):
+
+        """
+        Stores the loss of a config dict and evicts entries past the
+        size and age limits.
+
+        Args:
+            config (dict): Config dict mapping variable names to values
+            loss (float): Loss produced by the configuration
+        """
+
+        now = time.time()
+        with self._lock:
+            self._db.execute("INSERT OR REPLACE INTO evaluations "
+                             "VALUES (?, ?, ?, ?, ?)",
+                             (config_key(config),
+                              json.dumps(config, sort_keys=True),
+                              float(loss), now, now))
+            self._evict(now)
+            self._db.commit()
+
+    def _evict(self, now):
+        if self.max_age is not None:
+            self._db.execute("DELETE FROM evaluations WHERE created < ?",
+                             (now - self.max_age,))
+        if self.max_entries is not None:
+            self._db.execute("DELETE FROM evaluations WHERE key IN ("
+                             "SELECT key FROM evaluations ORDER BY accessed DESC "
+                             "LIMIT -1 OFFSET ?)", (self.max_entries,))
+
+    def evaluate(self, configuration, objective):
+
+        """
+        Reports the loss of a Configuration, running objective only if the
+        configuration is not already cached.
+
+        Args:
+            configuration (Configuration): Configuration to evaluate
+            objective (callable): Takes a Configuration and returns its loss
+
+        Returns:
+            float: The loss that was reported
+        """
+
+        loss = self.get(configuration.data["config"])
+        if loss is None:
+            loss = objective(configuration)
+            self.put(configuration.data["config"], loss)
+        configuration.report_loss(loss)
+        return loss
+
+    def clear(self):
+
+        """
+        Removes every entry.
+        """
+
+        with self._lock:
+            self._db.execute("DELETE FROM evaluations")
+            self._db.commit()
+
+    def close(self):
+
+        """
+        Closes the underlying database.
+        """
+
+        with self._lock:
+            self._db.close()
@@ -0,0 +1,237 @@
+import codecs
+import itertools
+import json
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from .__init__ import server
+
+
+def rejected(error):
+
+    """
+    Tells a request the server refused (a 4xx response), which sending
+    again cannot fix, from one that failed on the way or on the server.
+
+    Args:
+        error (requests.RequestException): The error a request raised
+
+    Returns:
+        bool: True if the server answered with a 4xx status
+    """
+
+    response = getattr(error, "response", None)
+    return response is not None and 400 <= response.status_code < 500
+
+
+def iter_json_array(chunks):
+
+    """
+    Incrementally parses a JSON array arriving in pieces, yielding each
+    element as soon as it is complete, so the whole body never has to be
+    held in memory. A body that is not an array is parsed whole; if it
+    is a dict with an "evaluations" list, those are yielded.
+
+    Args:
+        chunks (iterable): Pieces of the JSON text, as str
+
+    Yields:
+        JSON/dict: Each element of the array
+    """
+
+    decoder = json.JSONDecoder()
+    chunks = iter(chunks)
+    buf = ""
+    for chunk in chunks:
+        buf += chunk
+        if buf.strip():
+            break
+    buf = buf.lstrip()
+    if not buf.startswith("["):
+        body = json.loads(buf + "".join(chunks)) if buf else None
+        if isinstance(body, dict) and "evaluations" in body:
+            body = body["evaluations"]
+        if isinstance(body, list):
+            yield from body
+        elif body is not None:
+            yield body
+        return
+
+    pos = 1
+    for chunk in itertools.chain([""], chunks):
+        buf = buf[pos:] + chunk
+        pos = 0
+        while True:
+            while pos < len(buf) and buf[pos] in " \t\r\n,":
+                pos += 1
+            if pos == len(buf) or buf[pos] == "]":
+                break
+            try:
+                element, end = decoder.raw_decode(buf, pos)
+            except ValueError:
+                break  # element continues in the next chunk
+            if (isinstance(element, (int, float))
+                    and (end == len(buf) or buf[end] not in " \t\r\n,]")):
+                break  # a number may continue in the next chunk
+            yield element
+            pos = end
+        if pos < len(buf) and buf[pos] == "]":
+            return
+    raise ValueError("truncated JSON array")
+
+
+class Client:
+    instrumentation = None
+
+    def __init__(self, server_url=server, pool_size=10, timeout=(3.05, 30),
+                 retries=3, backoff_factor=0.3, status_forcelist=()):
+
+        """
+        Creates a pooled, keep-alive HTTP session for talking to the tinker
+        server. An Experiment owns one Client and hands it to every
+        Configuration it creates, so a worker reuses the same connection
+        for its whole run.
+
+        Only failures to connect are retried. A request that timed out or
+        failed after it was sent may already have been processed, and the
+        endpoints are not idempotent: sending "setup", "request" or
+        "report" again would create a second experiment, hand out and
+        orphan a second configuration, or report a loss twice.
+
+        Args:
+            server_url (str): Base URL of the tinker server
+            pool_size (int): Maximum number of pooled connections to keep open
+            timeout (float or tuple): Seconds to wait for the server, either a single
+                                      value or a (connect, read) tuple
+            retries (int): Number of times to retry a request that could
+                           not connect
+            backoff_factor (float): Base delay for exponential backoff between retries
+            status_forcelist (tuple): HTTP status codes that trigger a retry.
+                                      Only list codes the server answers
+                                      without acting on the request, e.g.
+                                      503 from a proxy in front of it.
+        """
+
+        self.server = server_url if server_url.endswith("/") else server_url + "/"
+        self.timeout = timeout
+
+        retry = Retry(total=retries, connect=retries, read=0,
+                      status=retries, backoff_factor=backoff_factor,
+                      status_forcelist=status_forcelist,
+                      allowed_methods=frozenset(["GET", "POST"]),
+                      raise_on_status=False)
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size,
+                              max_retries=retry)
+
+        self.session = requests.Session()
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        self.close()
+
+    def request(self, endpoint, payload):
+
+        """
+        POSTs a JSON payload to one of the server endpoints over the
+        pooled session.
+
+        Args:
+            endpoint (str): Name of the endpoint, e.g. "request" or "report"
+            payload (JSON/dict): Body of the request
+
+        Returns:
+            JSON/dict: Decoded response body, or None if the body was not JSON
+        """
+
+        if self.instrumentation is not None:
+            return self._instrumented_request(endpoint, payload)
+        r = self.session.post(self.server + endpoint, json=payload,
+                              timeout=self.timeout)
+        r.raise_for_status()
+        try:
+            return r.json()
+        except ValueError:
+            return None
+
+    def _instrumented_request(self, endpoint, payload):
+        phases = {}
+        start = time.time()
+        try:
+            body = json.dumps(payload)
+            sent = time.time()
+            phases["encode"] = sent - start
+            r = self.session.post(self.server + endpoint, data=body,
+                                  headers={"Content-Type": "application/json"},
+                                  timeout=self.timeout)
+            received = time.time()
+            phases["http"] = received - sent
+            if "X-Tinker-Server-Time" in r.headers:
+                phases["server"] = float(r.headers["X-Tinker-Server-Time"])
+            r.raise_for_status()
+            try:
+                response = r.json()
+            except ValueError:
+                response = None
+            phases["decode"] = time.time() - received
+        except Exception:
+            self.instrumentation.record(endpoint, start, time.time(), phases,
+                                        error=True)
+            raise
+        self.instrumentation.record(endpoint, start, time.time(), phases)
+        return response
+
+    def stream(self, endpoint, payload, chunk_size=65536):
+
+        """
+        POSTs a JSON payload and iterates over the elements of the list in
+        the response as they arrive, without loading the whole body. The
+        server is asked for newline-delimited JSON; a plain JSON array is
+        parsed incrementally instead.
+
+        Args:
+            endpoint (str): Name of the endpoint, e.g. "request_history"
+            payload (JSON/dict): Body of the request
+            chunk_size (int): Number of bytes read from the socket at a time
+
+        Yields:
+            JSON/dict: Each element of the response
+        """
+
+        start = time.time()
+        error = True
+        r = self.session.post(self.server + endpoint, json=payload,
+                              timeout=self.timeout, stream=True,
+                              headers={"Accept": "application/x-ndjson, "
+                                                 "application/json"})
+        try:
+            r.raise_for_status()
+            if r.headers.get("Content-Type", "").startswith("application/x-ndjson"):
+                for line in r.iter_lines(chunk_size=chunk_size):
+                    if line:
+                        yield json.loads(line)
+            else:
+                decoder = codecs.getincrementaldecoder(r.encoding or "utf-8")()
+                yield from iter_json_array(
+                    decoder.decode(chunk)
+                    for chunk in r.iter_content(chunk_size=chunk_size))
+            error = False
+        finally:
+            r.close()
+            if self.instrumentation is not None:
+                self.instrumentation.record(endpoint, start, time.time(),
+                                            error=error)
+
+    def close(self):
+
+        """
+        Closes every pooled connection held by this Client.
+        """
+
+        self.session.close()
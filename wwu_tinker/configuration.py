@@ -2,11 +2,69 @@ import json
 import requests
 import traceback
 
-from .__init__ import server
+import numpy as np
+
+from .client import Client, rejected
+from .history import shared_cache
+from .lease import Heartbeat
+from .pruning import PrunerProxy
+from .space import SearchSpace
+
+
+def _decode(value, spec):
+    if spec is None or value is None:
+        return value
+    if spec["type"] == "int":
+        return int(value)
+    if spec["type"] == "float":
+        return float(value)
+    return value
+
+
+def to_structured(configurations, schema, conditional=()):
+
+    """
+    Packs the values of many configurations into one structured array
+    with a column per variable, in the order of SearchSpace.names: int64
+    for ints, float64 for floats and object for enums, which hold the enum
+    values themselves. Where a conditional variable is inactive its column
+    holds NaN (conditional ints are stored as float64) or None.
+
+    Args:
+        configurations (list): Configuration objects
+        schema (dict): The experiment's variables, as in its "vars" JSON
+        conditional (set): Names treated as conditional even though they
+                           have no parent, e.g. ones a schema inferred
+                           from the configurations found missing
+
+    Returns:
+        np.ndarray: Structured array with one row per configuration
+    """
+
+    dtypes = {"int": np.int64, "float": np.float64, "enum": object}
+    names = SearchSpace(schema).names
+    conditional = {name for name in names
+                   if "parent" in schema[name] or name in conditional}
+    dtype = [(name, np.float64 if name in conditional
+              and schema[name]["type"] == "int" else dtypes[schema[name]["type"]])
+             for name in names]
+    array = np.empty(len(configurations), dtype=dtype)
+    for name in names:
+        spec = schema[name]
+        if name not in conditional:
+            array[name] = [c._values[name] for c in configurations]
+        else:
+            missing = None if spec["type"] == "enum" else np.nan
+            array[name] = [c._values.get(name, missing) for c in configurations]
+    return array
 
 
 class Configuration():
-    def __init__(self, config_json):
+    __slots__ = ("data", "_client", "_reporter", "_pruner", "_lease",
+                 "_heartbeat", "_journal", "_schema", "_values", "_space")
+
+    def __init__(self, config_json, client=None, reporter=None, pruner=None,
+                 lease=None, journal=None, schema=None, space=None):
 
         """
         Creates a new Configuration object given the raw JSON
@@ -15,15 +73,75 @@ class Configuration():
 
         Args:
             config_json (JSON/dict): raw configuration JSON returned by the server
+            client (Client): Session used to report back to the server. A new
+                             Client is created on first use if none is given.
+            reporter (callable): Called with this Configuration in place of
+                                 posting to the server when a loss is reported
+            pruner (Pruner): Early-stopping rule consulted by should_stop
+            lease (float): Seconds the server holds this configuration for
+                           between heartbeats, if it was leased
+            journal (Journal): Write-ahead log the loss is recorded in
+                               before it is sent
+            schema (dict): The experiment's variables, as in its "vars" JSON.
+                           Values are decoded once against it into native
+                           ints, floats and enum values; without it they are
+                           kept as the server sent them.
+            space (SearchSpace): The schema compiled, shared by the
+                                 experiment's configurations; compiled from
+                                 schema on first use if None
 
+        Hyperparameters can be read as config["lr"] or config.lr; the
+        attribute form is shadowed by Configuration's own methods, e.g. a
+        variable named "budget".
         """
 
         self.data = config_json
+        self._client = client
+        self._reporter = reporter
+        self._pruner = pruner
+        self._lease = lease
+        self._heartbeat = None
+        self._journal = journal
+        self._schema = schema
+        self._space = space
+        config = config_json.get("config", {})
+        if schema is None:
+            self._values = config
+        else:
+            self._values = {name: _decode(value, schema.get(name))
+                            for name, value in config.items()}
+
+    def __reduce__(self):
+        # Only the raw JSON, the decoded values and a PrunerProxy cross
+        # process boundaries; the client is recreated lazily on the other
+        # side if the copy reports a loss.
+        pruner = self._pruner if isinstance(self._pruner, PrunerProxy) else None
+        return (self.__class__, (self.data,),
+                (self._schema, self._values, pruner))
+
+    def __setstate__(self, state):
+        self._schema, self._values, self._pruner = state
+        self._space = None
+
+    def __getattr__(self, name):
+        # Only reached for names that are neither slots nor methods.
+        if not name.startswith("_"):
+            try:
+                return self._values[name]
+            except KeyError:
+                if self._is_conditional(name):
+                    return None
+        raise AttributeError("Configuration has no variable \"%s\"" % name)
+
+    def _is_conditional(self, name):
+        return self._schema is not None and "parent" in self._schema.get(name, {})
 
     def __getitem__(self, key):
 
         """
-        Allows for dict-like retrieval of elements.
+        Allows for dict-like retrieval of elements. A conditional variable
+        that is inactive in this configuration reads as None; a name the
+        experiment has no variable for raises KeyError, like a dict.
 
         Args:
             key (str): Name of a hyperparameter in the config
@@ -32,11 +150,60 @@ class Configuration():
             value: Int, float, or enum associated with hyperparameter
         """
 
-        value = self.data["config"][key]
-        if value is None:
-            print ("The key '%s' does not exist in this configuration")
-        else:
-            return self.data["config"][key]
+        try:
+            return self._values[key]
+        except KeyError:
+            if self._is_conditional(key):
+                return None
+            raise
+
+    def get(self, name, default=None):
+
+        """
+        Retrieves a hyperparameter like a dict does, without an error for
+        missing ones, e.g. an inactive conditional variable.
+
+        Args:
+            name (str): Name of the hyperparameter
+            default: Returned if the configuration has no such value
+
+        Returns:
+            value: Int, float, or enum associated with hyperparameter
+        """
+
+        return self._values.get(name, default)
+
+    def __contains__(self, key):
+        return key in self._values
+
+    def as_dict(self):
+
+        """
+        Returns:
+            dict: Maps each hyperparameter name to its decoded value
+        """
+
+        return dict(self._values)
+
+    def to_numpy(self):
+
+        """
+        Returns the hyperparameters as a point of the unit hypercube, e.g.
+        for surrogate models. It is the vector SearchSpace.encode gives,
+        one entry per variable in the order of SearchSpace.names, so it
+        lines up with every other encoded configuration of the experiment.
+
+        Returns:
+            np.ndarray: float64 vector, or None if the configuration was
+                        created without a schema
+        """
+
+        if self._schema is None:
+            print("Error: this configuration has no variable schema")
+            return None
+        if self._space is None:
+            self._space = SearchSpace(self._schema)
+        return self._space.encode([self._values])[0]
 
     def get_eval_id(self):
 
@@ -50,6 +217,19 @@ class Configuration():
 
         return self.data["eval_id"]
 
+    @property
+    def budget(self):
+
+        """
+        Resource budget (e.g. number of epochs) assigned to this
+        configuration by a multi-fidelity optimizer such as "hyperband".
+
+        Returns:
+            int/float: The budget, or None if the optimizer assigns none
+        """
+
+        return self.data.get("budget")
+
     def get_value(self, key):
 
         """
@@ -63,11 +243,7 @@ class Configuration():
 
         """
 
-        value = self.data["config"][key]
-        if value is None:
-            print ("The key '%s' does not exist in this configuration")
-        else:
-            return self.data["config"][key]
+        return self[key]
 
     def report_loss(self, loss):
 
@@ -83,11 +259,130 @@ class Configuration():
         try:
             loss = float(loss)
             self.data["result"] = loss
-            r = requests.post(server + "report", json=self.data)
+            if self._journal is not None:
+                self._journal.record_report(self.data)
+            if self._reporter is not None:
+                self._reporter(self)
+            else:
+                self._send_report()
+            if self._heartbeat is not None:
+                self._heartbeat.stop()
         except ValueError:
             traceback.print_stack()
             print("Error: reported loss must be a parsable float")
 
+    def report_metrics(self, metrics, objective=None):
+
+        """
+        Reports several metrics of this configuration at once, e.g. its
+        loss, inference latency and memory, so experiments can trade them
+        off with Experiment.get_pareto_front or the "pareto" optimizer.
+        One of them is also reported as the loss.
+
+        Args:
+            metrics (dict): Maps metric names to parsable floats, e.g.
+                            {"loss": 0.12, "latency_ms": 8.5}
+            objective (str): Metric reported as the loss; "loss" if present,
+                             otherwise the first one
+        """
+
+        try:
+            metrics = {name: float(value) for name, value in metrics.items()}
+        except (ValueError, TypeError):
+            traceback.print_stack()
+            print("Error: reported metrics must be parsable floats")
+            return
+        if objective is None:
+            objective = "loss" if "loss" in metrics else next(iter(metrics), None)
+        if objective not in metrics:
+            print("Error: \"%s\" is not one of the reported metrics" % objective)
+            return
+        self.data["metrics"] = metrics
+        return self.report_loss(metrics[objective])
+
+    def _send_report(self):
+        try:
+            self._get_client().request("report", self.data)
+            shared_cache.record(self._client, [self.data])
+        except requests.RequestException as e:
+            if rejected(e):
+                print("Error: the server rejected the loss of evaluation %s, "
+                      "it is dropped (%s)" % (self.get_eval_id(), e))
+            elif self._journal is None:
+                raise
+            else:
+                print("Warning: could not reach the server, the loss of "
+                      "evaluation %s stays in the journal" % self.get_eval_id())
+                return
+        if self._journal is not None:
+            self._journal.mark_sent([self.get_eval_id()])
+
+    def _get_client(self):
+        if self._client is None:
+            self._client = Client()
+        return self._client
+
+    def heartbeat(self, interval=None):
+
+        """
+        Starts a background thread that renews this configuration's lease
+        until its loss is reported. Can be used as a context manager
+        around the objective:
+
+            with config.heartbeat():
+                loss = train(config)
+
+        Args:
+            interval (float): Seconds between heartbeats, a third of the
+                              lease if None
+
+        Returns:
+            Heartbeat: The running heartbeat, or None if the configuration
+                       was not leased
+        """
+
+        if self._lease is None:
+            print("Error: this configuration was not leased, see Experiment.set_lease")
+            return None
+        if self._heartbeat is None:
+            self._heartbeat = Heartbeat(self, self._lease, interval).start()
+        return self._heartbeat
+
+    def report_intermediate(self, step, loss):
+
+        """
+        Records the loss of this configuration partway through training,
+        so the Experiment's pruner can judge whether to stop it early.
+
+        Args:
+            step (int): Training step or epoch the loss was measured at
+            loss (float): Loss at that step
+        """
+
+        if self._pruner is None:
+            print("Error: the experiment has no pruner, see Experiment.set_pruner")
+            return
+        try:
+            self._pruner.report(self.get_eval_id(), step, float(loss))
+        except ValueError:
+            traceback.print_stack()
+            print("Error: reported loss must be a parsable float")
+
+    def should_stop(self):
+
+        """
+        Asks the Experiment's pruner whether this configuration is doing
+        badly enough to stop training. A stopped configuration should
+        still report_loss its last intermediate loss.
+
+        Returns:
+            bool: True if training should stop
+        """
+
+        if self._pruner is None:
+            return False
+        return self._pruner.should_stop(self.get_eval_id())
+
     def __str__(self):
         if len(self.data.keys()) <= 20:
             keys = ""
@@ -0,0 +1,210 @@
+import contextlib
+import copy
+import time
+import traceback
+from concurrent.futures import (FIRST_COMPLETED, ProcessPoolExecutor,
+                                ThreadPoolExecutor, wait)
+
+import numpy as np
+
+from .pruning import PrunerServer
+
+
+def _evaluate(objective, config):
+    return objective(config)
+
+
+def _timed_evaluate(objective, config):
+    start = time.time()
+    return objective(config), start, time.time()
+
+
+def _with_pruner(config, pruner_server):
+    # The copy sent to a worker process reaches the pruner through a proxy.
+    remote = copy.copy(config)
+    remote._pruner = pruner_server.proxy()
+    return remote
+
+
+def run(experiment, objective, n_trials=None, workers=1, backend="thread",
+        time_budget=None, cache=None):
+
+    """
+    Evaluates configurations of a submitted Experiment on a local pool of
+    workers. Configurations are fetched from the server, handed to
+    objective on a concurrent.futures pool, and each loss is reported as
+    soon as its evaluation finishes. New trials stop being started once
+    n_trials have been launched or time_budget seconds have passed.
+
+    With the "process" backend the objective must be picklable (e.g. a
+    module-level function). Only the raw configuration JSON is sent to the
+    worker processes; losses are reported from the calling process. If the
+    experiment has a pruner, the workers' report_intermediate and
+    should_stop calls are forwarded to it in the calling process.
+    If the experiment leases its configurations, their heartbeats are
+    also sent from the calling process. If it is instrumented, every
+    objective call is recorded under "objective".
+
+    Args:
+        experiment (Experiment): Submitted experiment to draw configurations from
+        objective (callable): Takes a Configuration and returns its loss
+        n_trials (int): Maximum number of configurations to evaluate
+        workers (int): Number of evaluations to run at once
+        backend (str): "thread" or "process"
+        time_budget (float): Seconds after which no new trials are started
+        cache (EvaluationCache): Configurations found in the cache are
+                                 reported with their cached loss instead of
+                                 being evaluated; new losses are added to it
+
+    Returns:
+        list: (Configuration, loss) pairs in the order they finished
+    """
+
+    if backend == "thread":
+        executor = ThreadPoolExecutor(max_workers=workers)
+    elif backend == "process":
+        executor = ProcessPoolExecutor(max_workers=workers)
+    else:
+        print("Error: \"%s\" is not a valid backend" % backend)
+        return []
+    if n_trials is None and time_budget is None:
+        print("Error: must provide n_trials or time_budget")
+        return []
+
+    deadline = None if time_budget is None else time.time() + time_budget
+    results = []
+    running = {}
+    submitted = {}
+    started = 0
+    exhausted = False
+    instrumentation = getattr(experiment, "instrumentation", None)
+    evaluate = _evaluate if instrumentation is None else _timed_evaluate
+    pruner_server = None
+    if backend == "process" and getattr(experiment, "pruner", None) is not None:
+        pruner_server = PrunerServer(experiment.pruner)
+
+    def budget_left():
+        if n_trials is not None and started >= n_trials:
+            return 0
+        if deadline is not None and time.time() >= deadline:
+            return 0
+        if n_trials is None:
+            return workers
+        return n_trials - started
+
+    with pruner_server or contextlib.nullcontext(), executor:
+        while True:
+            free = min(workers - len(running), budget_left())
+            if free > 0 and not exhausted:
+                configs = experiment.next_configurations(free)
+                exhausted = len(configs) < free
+                for config in configs:
+                    started += 1
+                    if cache is not None:
+                        loss = cache.get(config.data["config"])
+                        if loss is not None:
+                            config.report_loss(loss)
+                            results.append((config, loss))
+                            continue
+                    if experiment.lease is not None:
+                        config.heartbeat()
+                    if pruner_server is not None:
+                        future = executor.submit(
+                            evaluate, objective,
+                            _with_pruner(config, pruner_server))
+                    else:
+                        future = executor.submit(evaluate, objective, config)
+                    running[future] = config
+                    submitted[future] = time.time()
+            if not running:
+                if free > 0 and not exhausted:
+                    continue
+                break
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                config = running.pop(future)
+                submit_time = submitted.pop(future)
+                try:
+                    loss = future.result()
+                except Exception:
+                    if instrumentation is not None:
+                        instrumentation.record("objective", submit_time,
+                                               time.time(), error=True)
+                    traceback.print_exc()
+                    print("Error: objective failed on evaluation %s"
+                          % config.get_eval_id())
+                    if config._heartbeat is not None:
+                        config._heartbeat.stop()
+                    continue
+                if instrumentation is not None:
+                    loss, start, end = loss
+                    instrumentation.record("objective", start, end)
+                if cache is not None:
+                    cache.put(config.data["config"], loss)
+                config.report_loss(loss)
+                results.append((config, loss))
+    return results
+
+
+def run_batch(experiment, objective, n_trials=None, batch_size=64,
+              time_budget=None):
+
+    """
+    Evaluates configurations of a submitted Experiment a whole batch at a
+    time. Each batch is fetched with Experiment.next_batch, objective is
+    called once on its structured array, and the returned losses are
+    reported with a single Experiment.report_losses call. Meant for cheap
+    NumPy objectives, where per-configuration overhead dominates:
+
+        run_batch(expt, lambda b: cost_function(b["x"], b["y"]), n_trials=10000)
+
+    Args:
+        experiment (Experiment): Submitted experiment to draw configurations from
+        objective (callable): Takes a structured array with one row per
+                              configuration and returns a loss per row
+        n_trials (int): Maximum number of configurations to evaluate
+        batch_size (int): Number of configurations per objective call
+        time_budget (float): Seconds after which no new batches are started
+
+    Returns:
+        list: (Configuration, loss) pairs in the order they were evaluated
+    """
+
+    if n_trials is None and time_budget is None:
+        print("Error: must provide n_trials or time_budget")
+        return []
+
+    deadline = None if time_budget is None else time.time() + time_budget
+    instrumentation = getattr(experiment, "instrumentation", None)
+    results = []
+    while n_trials is None or len(results) < n_trials:
+        if deadline is not None and time.time() >= deadline:
+            break
+        size = batch_size
+        if n_trials is not None:
+            size = min(size, n_trials - len(results))
+        configs, batch = experiment.next_batch(size)
+        if not configs:
+            break
+        start = time.time()
+        try:
+            losses = np.asarray(objective(batch), dtype=np.float64).ravel()
+        except Exception:
+            if instrumentation is not None:
+                instrumentation.record("objective", start, time.time(), error=True)
+            traceback.print_exc()
+            print("Error: objective failed on a batch of %d configurations"
+                  % len(configs))
+            break
+        if instrumentation is not None:
+            instrumentation.record("objective", start, time.time())
+        if len(losses) != len(configs):
+            print("Error: objective returned %d losses for %d configurations"
+                  % (len(losses), len(configs)))
+            break
+        batch_results = list(zip(configs, losses.tolist()))
+        experiment.report_losses(batch_results)
+        results.extend(batch_results)
+        if len(configs) < size:
+            break
+    return results
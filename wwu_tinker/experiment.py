@@ -1,14 +1,43 @@
 import json
 import requests
+import traceback
 
-from .configuration import Configuration
+import numpy as np
+
+from .client import Client, rejected
+from .configuration import Configuration, to_structured
+from .driver import run, run_batch
+from .history import History, _infer_variables, shared_cache
+from .pareto import ParetoFront
+from .prefetch import Prefetcher
+from .space import SearchSpace
 from .variable import Variable
-from .__init__ import server
+
+
+def unpack_configurations(response_json):
+
+    """
+    Splits a response from the "request" endpoint into one dict per
+    configuration. The server may answer with a single configuration,
+    a list of them, or a dict holding the list under "configs".
+
+    Args:
+        response_json (JSON/dict/list): Decoded response body
+
+    Returns:
+        list: Raw configuration dicts
+    """
+
+    if isinstance(response_json, list):
+        return response_json
+    if "configs" in response_json:
+        return response_json["configs"]
+    return [response_json]
 
 
 class Experiment:
     def __init__(self, name="Experiment", load_fn=None,
-                 optimizer="random", expt_id=None):
+                 optimizer="random", expt_id=None, client=None, server=None):
 
         """
         Initialize a new experiment with the given name. If load_fn
@@ -21,6 +50,12 @@ class Experiment:
             optimizer (str): Name of the optimizer that the
                              user would like to use. This can be set later.
             expt_id (str) : ID of already initialized experiment
+            client (Client): Pooled session used for every server call made by
+                             this Experiment and its Configurations. A new
+                             Client is created if none is given.
+            server (str): URL of the tinker server used when no client is
+                          given, e.g. a local one started with
+                          python -m wwu_tinker.server
 
         Todo: Add a validator for loading experiment files? Or just let
               the user be responsible for not messing it up?
@@ -33,6 +68,17 @@ class Experiment:
                           "optimizer": optimizer}
 
         self.experiment_id = expt_id
+        if client is None:
+            client = Client() if server is None else Client(server_url=server)
+        self.client = client
+        self._batch_reports = True
+        self.pruner = None
+        self.lease = None
+        self.journal = None
+        self.instrumentation = None
+        self.history_cache = shared_cache
+        self._space = None
+        self._space_key = None
 
     def __str__(self):
         return json.dumps(self._data, indent=2)
@@ -83,7 +129,8 @@ class Experiment:
     def add_var(self, var):
 
         """
-        Adds a Variable to this Experiment.
+        Adds a Variable to this Experiment. A conditional Variable must be
+        added after its parent.
 
         Args:
             var (Variable): Any valid variable
@@ -92,15 +139,11 @@ class Experiment:
         if isinstance(var, Variable) is False:
             print("Error: var must be of type Variable")
             return
-        var_dict = {}
-        var_dict["type"] = var.type
-        if var.type == "int" or var.type == "float":
-            var_dict["range"] = var.range
-            if var.step_size is not None:
-                var_dict["step_size"] = var.step_size
-        else:
-            var_dict["values"] = var.values
-        self._data["vars"][var.name] = var_dict
+        if var.parent is not None and var.parent not in self._data["vars"]:
+            print("Error: the parent \"%s\" of \"%s\" must be added first"
+                  % (var.parent, var.name))
+            return
+        self._data["vars"][var.name] = var.to_dict()
 
     def add_vars(self, var_list):
 
@@ -118,21 +161,179 @@ class Experiment:
             for var in var_list:
                 self.add_var(var)
 
-    def set_optimizer(self, optimizer):
+    def search_space(self):
+
+        """
+        Compiles the variables added so far, e.g. for encoding
+        configurations to the unit hypercube for a surrogate model. The
+        result is shared with Configuration.to_numpy and recompiled only
+        when variables are added.
+
+        Returns:
+            SearchSpace: The compiled variables
+        """
+
+        variables = self._data["vars"]
+        key = (id(variables), len(variables))
+        if self._space is None or self._space_key != key:
+            self._space = SearchSpace(variables)
+            self._space_key = key
+        return self._space
+
+    def _compiled_space(self):
+        return self.search_space() if self._data["vars"] else None
+
+    def set_optimizer(self, optimizer, **options):
 
         """
         Sets the optimizer for the for the experiment.
         Verifies that it is a valid optimizer.
 
+        The "hyperband" optimizer treats one int or float variable as a
+        resource budget and needs its name, e.g.
+        set_optimizer("hyperband", resource="epochs", reduction_factor=3).
+        Each Configuration then carries its assigned budget.
+
+        The "pareto" optimizer trades off several metrics reported with
+        Configuration.report_metrics, e.g.
+        set_optimizer("pareto", objectives=["loss", "latency_ms"]).
+
         Args:
             optimizer (string): The optimizer you would
             like to set up for your experiment.
+            options: Extra settings for the optimizer
         """
-        if optimizer in ["random", "bayesian", "grid", "horde", "latin_hyper"]:
+        if optimizer == "hyperband" and "resource" not in options:
+            print("Error: the hyperband optimizer needs a resource variable")
+        elif optimizer == "pareto" and not options.get("objectives"):
+            print("Error: the pareto optimizer needs a list of objectives")
+        elif optimizer in ["random", "bayesian", "grid", "horde", "latin_hyper",
+                           "hyperband", "pareto"]:
             self._data["optimizer"] = optimizer
+            if options:
+                self._data["optimizer_options"] = options
+            else:
+                self._data.pop("optimizer_options", None)
         else:
             print("%s is not a valid optimizer" % optimizer)
 
+    def set_pruner(self, pruner):
+
+        """
+        Sets the early-stopping rule used by Configuration.should_stop
+        for configurations handed out from now on.
+
+        Args:
+            pruner (Pruner): e.g. MedianPruner() or SuccessiveHalvingPruner()
+        """
+
+        self.pruner = pruner
+
+    def set_lease(self, duration):
+
+        """
+        Asks the server to lease every configuration handed out from now
+        on for the given number of seconds. A leased configuration that is
+        neither reported nor kept alive with Configuration.heartbeat before
+        its lease runs out is considered lost and is handed out again.
+
+        Args:
+            duration (float): Length of a lease in seconds, or None to stop leasing
+        """
+
+        self.lease = duration
+
+    def instrument(self, instrumentation):
+
+        """
+        Times every server call made by this Experiment and its
+        Configurations, and every objective evaluation made by run, with
+        the given Instrumentation.
+
+        Args:
+            instrumentation (Instrumentation): Collects the timings, or None
+                                               to stop timing
+        """
+
+        self.instrumentation = instrumentation
+        self.client.instrumentation = instrumentation
+
+    def _make_configuration(self, config_json):
+        if self.journal is not None:
+            self.journal.record_issue(config_json)
+        return Configuration(config_json, client=self.client,
+                             pruner=self.pruner, lease=self.lease,
+                             journal=self.journal,
+                             schema=self._data["vars"] or None,
+                             space=self._compiled_space())
+
+    def attach_journal(self, journal):
+
+        """
+        Records every configuration handed out and every loss reported from
+        now on in a write-ahead Journal. Losses are written to the journal
+        before they are sent; if the server cannot be reached they stay
+        there until replay_journal sends them.
+
+        Args:
+            journal (Journal): The journal to write to
+        """
+
+        self.journal = journal
+        if journal.expt_id is None and self.experiment_id is not None:
+            journal.record_experiment(self.experiment_id)
+
+    def replay_journal(self, batch_size=500):
+
+        """
+        Sends every loss in the journal that has not reached the server
+        yet, batch_size at a time.
+
+        Returns:
+            int: Number of losses sent
+        """
+
+        pending = self.journal.pending()
+        for start in range(0, len(pending), batch_size):
+            self._send_evaluations(pending[start:start + batch_size])
+        return len(pending)
+
+    def resume(self, journal):
+
+        """
+        Continues a run from its journal, e.g. after a crash: pending
+        losses are replayed to the server, and the configurations that were
+        issued but never finished are handed back to be evaluated. Finished
+        evaluations are not re-run. Use together with load_expt to restore
+        the variables.
+
+        Args:
+            journal (Journal): Journal of the interrupted run
+
+        Returns:
+            list: Configuration objects that still need a loss
+        """
+
+        if self.experiment_id is None:
+            self.experiment_id = journal.expt_id
+        self.attach_journal(journal)
+        try:
+            self.replay_journal()
+        except requests.RequestException:
+            print("Warning: could not reach the server, pending losses stay "
+                  "in the journal")
+        return [Configuration(e, client=self.client, pruner=self.pruner,
+                              lease=self.lease, journal=self.journal,
+                              schema=self._data["vars"] or None,
+                              space=self._compiled_space())
+                for e in journal.unfinished()]
+
+    def _request_payload(self, order_size):
+        payload = {"expt_id": self.experiment_id, "order_size": order_size}
+        if self.lease is not None:
+            payload["lease"] = self.lease
+        return payload
+
     def submit(self):
 
         """
@@ -147,29 +348,254 @@ class Experiment:
 
         """
 
-        r = requests.post(server + "setup", json=self._data)
-        response_json = r.json()
+        response_json = self.client.request("setup", self._data)
         self.experiment_id = str(response_json["expt_id"])
+        if self.journal is not None:
+            self.journal.record_experiment(self.experiment_id)
         return self.experiment_id
 
     def next_configuration(self, order_size=1):
 
         """
         Requests the next configuration for evaluation from the server.
+        Use next_configurations to retrieve several at once.
 
         Args:
-            order_size (int): Number of configurations to be retrieved
+            order_size (int): Must be 1; kept for backwards compatibility
 
         Returns:
-            JSON/dict: Dictionary of hyperparameter values for all variables
-                       in the experiment
+            Configuration: Hyperparameter values for all variables
+                           in the experiment, or None once the optimizer
+                           has run out, e.g. at the end of a grid
 
         """
 
-        payload = {"expt_id": self.experiment_id, "order_size": order_size}
-        r = requests.post(server + "request", json=payload)
-        response_json = r.json()
-        return Configuration(json.loads(r.text))
+        if order_size != 1:
+            print("Error: next_configuration returns one configuration, use "
+                  "next_configurations(%s) for more" % order_size)
+            return None
+        payload = self._request_payload(1)
+        response_json = self.client.request("request", payload)
+        configs = unpack_configurations(response_json)
+        if not configs:
+            return None
+        return self._make_configuration(configs[0])
+
+    def next_configurations(self, n):
+
+        """
+        Requests a batch of configurations for evaluation from the server
+        in as few round trips as possible. A single request asks for all n;
+        if the server sends back fewer, the remainder is requested again.
+        Fewer than n are returned only once the optimizer runs out, e.g. at
+        the end of a grid.
+
+        Args:
+            n (int): Number of configurations to be retrieved
+
+        Returns:
+            list: Up to n Configuration objects
+        """
+
+        configs = []
+        while len(configs) < n:
+            payload = self._request_payload(n - len(configs))
+            response_json = self.client.request("request", payload)
+            batch = unpack_configurations(response_json)
+            if not batch:
+                break
+            configs.extend(self._make_configuration(c) for c in batch)
+        return configs[:n]
+
+    def next_batch(self, n):
+
+        """
+        Requests n configurations and packs their values into a structured
+        array with one column per variable, for objectives that evaluate a
+        whole batch at once. Report the losses with report_batch.
+
+        Args:
+            n (int): Number of configurations to request
+
+        Returns:
+            tuple: (list of Configuration objects, structured np.ndarray
+                   with one row per configuration)
+        """
+
+        configs = self.next_configurations(n)
+        schema, conditional = self._data["vars"], ()
+        if not schema and configs:
+            schema, conditional = _infer_variables(
+                [c._values for c in configs])
+        return configs, to_structured(configs, schema, conditional)
+
+    def report_batch(self, configurations, losses):
+
+        """
+        Reports a vector of losses, one per configuration, in one bulk call.
+
+        Args:
+            configurations (list): Configuration objects from next_batch
+            losses (array-like): Loss of each configuration, in the same order
+        """
+
+        losses = np.asarray(losses, dtype=np.float64).ravel()
+        if len(losses) != len(configurations):
+            print("Error: got %d losses for %d configurations"
+                  % (len(losses), len(configurations)))
+            return
+        self.report_losses(zip(configurations, losses.tolist()))
+
+    def recover_expired(self):
+
+        """
+        Asks the server to re-issue every configuration whose lease ran
+        out without a reported loss, e.g. because its worker was
+        preempted. The re-issued configurations get a fresh lease.
+
+        Returns:
+            list: Configuration objects to evaluate again
+        """
+
+        payload = {"expt_id": self.experiment_id, "lease": self.lease}
+        response_json = self.client.request("recover", payload)
+        return [self._make_configuration(c)
+                for c in unpack_configurations(response_json)]
+
+    def report_losses(self, results):
+
+        """
+        Reports the losses of many configurations to the server in one POST.
+        Falls back to one "report" call per configuration if the server
+        does not provide the "report_batch" endpoint. Losses the server
+        rejects are dropped with an error; with a journal attached, those
+        that cannot reach it stay pending in the journal.
+
+        Args:
+            results (list): (Configuration, loss) pairs
+        """
+
+        try:
+            results = [(config, float(loss)) for config, loss in results]
+        except ValueError:
+            traceback.print_stack()
+            print("Error: reported loss must be a parsable float")
+            return
+        for config, loss in results:
+            config.data["result"] = loss
+        evaluations = [config.data for config, _ in results]
+
+        if self.journal is None:
+            self._send_evaluations(evaluations)
+            return
+        for evaluation in evaluations:
+            if self.journal.reported.get(evaluation["eval_id"]) is not evaluation:
+                self.journal.record_report(evaluation)
+        try:
+            self._send_evaluations(evaluations)
+        except requests.RequestException:
+            pending = [e for e in evaluations
+                       if e["eval_id"] not in self.journal.sent]
+            print("Warning: could not reach the server, %d losses stay in "
+                  "the journal" % len(pending))
+
+    def _send_evaluations(self, evaluations):
+        # Each report is marked sent in the journal as soon as the server
+        # has settled it, so a failure part way through leaves only the
+        # rest pending. Reports the server rejects are dropped, since
+        # sending them again cannot succeed; a batch it rejects is sent
+        # one report at a time so that only the bad ones are dropped.
+        if self._batch_reports:
+            payload = {"expt_id": self.experiment_id,
+                       "evaluations": evaluations}
+            try:
+                self.client.request("report_batch", payload)
+                self.history_cache.record(self.client, evaluations)
+                self._mark_sent(evaluations)
+                return
+            except requests.HTTPError as e:
+                if not rejected(e):
+                    raise
+                if e.response.status_code == 404:
+                    self._batch_reports = False
+        for evaluation in evaluations:
+            try:
+                self.client.request("report", evaluation)
+                self.history_cache.record(self.client, [evaluation])
+            except requests.HTTPError as e:
+                if not rejected(e):
+                    raise
+                print("Error: the server rejected the loss of evaluation %s, "
+                      "it is dropped (%s)" % (evaluation["eval_id"], e))
+            self._mark_sent([evaluation])
+
+    def _mark_sent(self, evaluations):
+        if self.journal is not None:
+            self.journal.mark_sent([e["eval_id"] for e in evaluations])
+
+    def prefetch(self, queue_size=4, n_configs=None):
+
+        """
+        Iterates over configurations fetched ahead of time by a background
+        thread. Losses reported on the yielded configurations are sent to
+        the server asynchronously in batches. Use it as a context manager,
+        or call close(), so that every reported loss is flushed.
+
+        Args:
+            queue_size (int): Number of configurations to keep ready
+            n_configs (int): Total number of configurations to hand out.
+                             Iterates until closed if None.
+
+        Returns:
+            Prefetcher: Iterator of Configuration objects
+        """
+
+        return Prefetcher(self, queue_size=queue_size, n_configs=n_configs)
+
+    def run(self, objective, n_trials=None, workers=1, backend="thread",
+            time_budget=None, cache=None):
+
+        """
+        Runs the fetch, evaluate and report loop for this Experiment on a
+        local thread or process pool.
+
+        Args:
+            objective (callable): Takes a Configuration and returns its loss
+            n_trials (int): Maximum number of configurations to evaluate
+            workers (int): Number of evaluations to run at once
+            backend (str): "thread" or "process"
+            time_budget (float): Seconds after which no new trials are started
+            cache (EvaluationCache): Reuse losses of configurations that were
+                                     already evaluated instead of rerunning them
+
+        Returns:
+            list: (Configuration, loss) pairs in the order they finished
+        """
+
+        return run(self, objective, n_trials=n_trials, workers=workers,
+                   backend=backend, time_budget=time_budget, cache=cache)
+
+    def run_batch(self, objective, n_trials=None, batch_size=64,
+                  time_budget=None):
+
+        """
+        Runs the fetch, evaluate and report loop for this Experiment with
+        an objective that evaluates a whole batch of configurations in one
+        call.
+
+        Args:
+            objective (callable): Takes a structured array with one column
+                                  per variable and returns a loss per row
+            n_trials (int): Maximum number of configurations to evaluate
+            batch_size (int): Number of configurations per objective call
+            time_budget (float): Seconds after which no new batches are started
+
+        Returns:
+            list: (Configuration, loss) pairs in the order they were evaluated
+        """
+
+        return run_batch(self, objective, n_trials=n_trials,
+                         batch_size=batch_size, time_budget=time_budget)
 
     def get_evaluation_history(self):
         """
@@ -183,21 +609,92 @@ class Experiment:
 
             """
         payload = {"expt_id" : self.experiment_id}
-        response = requests.post(server + "request_history", json=payload)
-        return response.json()
+        return self.client.request("request_history", payload)
+
+    def stream_history(self, consumer=None, chunk_size=1024):
+
+        """
+        Downloads every complete evaluation and feeds it to consumer while
+        the response is still arriving, chunk_size evaluations at a time,
+        so the full list of dicts is never held in memory.
+
+        Args:
+            consumer: Anything with an extend(records) method, e.g. a
+                      History or a TopK. A new History if None.
+            chunk_size (int): Number of evaluations passed to each extend call
+
+        Returns:
+            The consumer
+        """
+
+        if consumer is None:
+            consumer = History(self._data["vars"] or None)
+        payload = {"expt_id": self.experiment_id}
+        chunk = []
+        for evaluation in self.client.stream("request_history", payload):
+            chunk.append(evaluation)
+            if len(chunk) == chunk_size:
+                consumer.extend(chunk)
+                chunk = []
+        consumer.extend(chunk)
+        return consumer
+
+    def get_pareto_front(self, objectives, maximize=(), chunk_size=1024):
+
+        """
+        Finds the evaluations that no other evaluation beats on every
+        objective, streaming the history so it is never held in memory.
+        Evaluations reported without every objective are skipped. Keep
+        the returned front up to date by passing new results to its
+        append method.
+
+        Args:
+            objectives (list): Metric names, e.g. ["loss", "latency_ms"]
+            maximize (tuple): Names of the objectives where larger is better
+            chunk_size (int): Number of evaluations read at a time
+
+        Returns:
+            ParetoFront: The front; front() lists its evaluations
+        """
+
+        return self.stream_history(ParetoFront(objectives, maximize=maximize),
+                                   chunk_size=chunk_size)
+
+    def get_history(self):
+
+        """
+        Returns every complete evaluation as typed columns, which is far
+        smaller and faster to query than the list of dicts returned by
+        get_evaluation_history. The history is cached per server and
+        experiment_id, shared by every Experiment of this process, and
+        each call only downloads evaluations completed since the previous
+        one. The same History object is updated in place.
 
-    def get_best_evaluation(self):
+        Returns:
+            History: Columnar view of every evaluation
+        """
+
+        return self.history_cache.sync(self)
+
+    def get_best_evaluation(self, cached=False):
         """
             Requests the best evaluation so far from the server.
 
             Args:
-                None
+                cached (bool): Answer from the history cached by get_history
+                               and the losses reported from this process
+                               since, without contacting the server. The
+                               history is synced first if it was never
+                               fetched.
             Returns:
                 JSON/dict: Contains best configuration and matching reuslt.
         """
+        if cached:
+            if self.history_cache.get(self) is None:
+                self.get_history()
+            return self.history_cache.best(self)
         payload = {"expt_id" : self.experiment_id}
-        response = requests.post(server + "request_best_eval", json=payload)
-        return response.json()
+        return self.client.request("request_best_eval", payload)
 
     def report_configuration(self, configuration, result):
         """
@@ -210,9 +707,9 @@ class Experiment:
         payload = dict({"expt_id": self.experiment_id,
                         "config": configuration,
                         "result": result})
-        response = requests.post(server + "report_config", json=payload)
-        print(response)
-        return response.json()
+        response = self.client.request("report_config", payload)
+        self.history_cache.record(self.client, [payload])
+        return response
 
     def set_experiment_id(self, experiment_id):
         """
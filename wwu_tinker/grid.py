@@ -0,0 +1,157 @@
+import bisect
+
+import numpy as np
+
+from .space import SearchSpace
+
+
+class Grid:
+    def __init__(self, variables, indices=None):
+
+        """
+        Lazy view of the Cartesian product of every variable's levels. The
+        k-th configuration is computed from k as a mixed-radix number (the
+        last variable in sorted order varies fastest), so the product is
+        never built. Slicing, sharding and resuming return new views in
+        O(1). A conditional space is walked one branch after the other
+        (see SearchSpace.branches), so inactive variables never multiply
+        the size of the grid.
+
+        len() only works up to sys.maxsize points, a limit of Python's;
+        count gives the number of points of a view of any size.
+
+        Args:
+            variables (dict or SearchSpace): Maps variable names to their
+                                             JSON, i.e. Experiment.data["vars"],
+                                             or the compiled SearchSpace
+            indices (range): Positions of the full grid covered by this view.
+                             Defaults to the whole grid.
+        """
+
+        self.space = (variables if isinstance(variables, SearchSpace)
+                      else SearchSpace(variables))
+        self.variables = self.space.variables
+        self.names = self.space.names
+        self.branches = self.space.branches()
+        self.shapes = [tuple(branch.levels.tolist()) for branch in self.branches]
+        self.offsets = [0]
+        for branch in self.branches:
+            self.offsets.append(self.offsets[-1] + branch.size())
+        self.size = self.offsets[-1]
+        self.indices = indices if indices is not None else range(self.size)
+
+    def __len__(self):
+        return len(self.indices)
+
+    @property
+    def count(self):
+
+        """
+        Returns:
+            int: Number of points in this view, even beyond sys.maxsize
+        """
+
+        r = self.indices
+        if r.step > 0:
+            return max(0, (r.stop - r.start + r.step - 1) // r.step)
+        return max(0, (r.start - r.stop - r.step - 1) // -r.step)
+
+    def __iter__(self):
+        for start in range(0, self.count, 1024):
+            for config in self.batch(start, start + 1024):
+                yield config
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            return Grid(self.space, self.indices[key])
+        return self.config(self.indices[key])
+
+    def config(self, index):
+
+        """
+        Computes the configuration at a position of the full grid.
+
+        Args:
+            index (int): Position in the full grid, in [0, self.size)
+
+        Returns:
+            dict: Config dict mapping variable names to values
+        """
+
+        b = bisect.bisect_right(self.offsets, index) - 1
+        branch, index = self.branches[b], index - self.offsets[b]
+        digits = []
+        for count in reversed(self.shapes[b]):
+            index, digit = divmod(index, count)
+            digits.append(digit)
+        digits.reverse()
+        return {name: branch.values(name, np.array([digit]))[0]
+                for name, digit in zip(branch.names, digits)}
+
+    def batch(self, start, stop):
+
+        """
+        Computes the configurations at positions [start, stop) of this
+        view, vectorized with NumPy when the grid fits in an int64.
+
+        Args:
+            start (int): First position in this view
+            stop (int): Position after the last one; clipped to self.count
+
+        Returns:
+            list: Config dicts mapping variable names to values
+        """
+
+        indices = self.indices[start:stop]
+        if len(indices) == 0:
+            return []
+        if self.size >= 2 ** 63 or indices.step < 0:
+            return [self.config(index) for index in indices]
+        configs = []
+        for b, branch in enumerate(self.branches):
+            lo = bisect.bisect_left(indices, self.offsets[b])
+            hi = bisect.bisect_left(indices, self.offsets[b + 1])
+            if lo == hi:
+                continue
+            part = indices[lo:hi]
+            digits = np.unravel_index(
+                np.arange(part.start, part.stop, part.step, dtype=np.int64)
+                - self.offsets[b], self.shapes[b])
+            columns = [branch.values(name, digit)
+                       for name, digit in zip(branch.names, digits)]
+            configs.extend(dict(zip(branch.names, row)) for row in zip(*columns))
+        return configs
+
+    def shard(self, worker, n_workers, contiguous=False):
+
+        """
+        Splits this view between workers without overlap.
+
+        Args:
+            worker (int): Index of this worker, in [0, n_workers)
+            n_workers (int): Total number of workers
+            contiguous (bool): Give each worker one contiguous block instead
+                               of every n_workers-th point
+
+        Returns:
+            Grid: The part of this view assigned to worker
+        """
+
+        if contiguous:
+            n = self.count
+            return self[worker * n // n_workers:(worker + 1) * n // n_workers]
+        return self[worker::n_workers]
+
+    def resume(self, position):
+
+        """
+        Skips the first position configurations of this view.
+
+        Args:
+            position (int): Number of configurations already evaluated
+
+        Returns:
+            Grid: The remaining part of this view
+        """
+
+        return self[position:]
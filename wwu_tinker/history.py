@@ -0,0 +1,661 @@
+import heapq
+import itertools
+import threading
+
+import numpy as np
+
+from .space import SearchSpace
+
+_DTYPES = {"int": np.int64, "float": np.float64, "enum": np.int32}
+# Inferred types widen in this order when configurations disagree
+_TYPE_ORDER = ("int", "float", "enum")
+
+
+def _infer_variables(configs):
+    variables = {}
+    counts = {}
+    for config in configs:
+        for name, value in config.items():
+            if value is None:
+                continue
+            counts[name] = counts.get(name, 0) + 1
+            if isinstance(value, bool) or not isinstance(value, (int, float)):
+                v_type = "enum"
+            elif isinstance(value, int):
+                v_type = "int"
+            else:
+                v_type = "float"
+            if name in variables:
+                v_type = max(v_type, variables[name]["type"], key=_TYPE_ORDER.index)
+            variables[name] = {"type": v_type}
+    for var in variables.values():
+        if var["type"] == "enum":
+            var["values"] = []
+    partial = {name for name, count in counts.items() if count < len(configs)}
+    return variables, partial
+
+
+class History:
+    def __init__(self, variables=None, capacity=1024):
+
+        """
+        Columnar store of completed evaluations. Each variable is kept in
+        its own typed NumPy column (int64 for ints, float64 for floats,
+        int32 codes into a dictionary of values for enums) next to a
+        float64 result column. Columns grow by doubling, and every export
+        is a view of the first len(self) rows rather than a copy.
+        Conditional variables are left out of the rows they are inactive
+        in: their column holds NaN there (ints are stored as float64) or
+        the enum code -1.
+
+        Args:
+            variables (dict): Maps variable names to their JSON, i.e.
+                              Experiment.data["vars"]. Inferred from the
+                              evaluations as they are added if None; a
+                              name missing from some of them is treated
+                              as conditional.
+            capacity (int): Number of rows to allocate up front
+        """
+
+        self.variables = None
+        self.names = []
+        self.conditional = set()
+        self.dictionaries = {}
+        self._codes = {}
+        self._columns = {}
+        self._result = np.empty(capacity)
+        self._n = 0
+        self._best = None
+        self._inferred = False
+        if variables:
+            self._set_variables(variables)
+
+    @classmethod
+    def from_records(cls, records, variables=None):
+
+        """
+        Builds a History from the list returned by
+        Experiment.get_evaluation_history.
+
+        Args:
+            records (list): [{"config": {...}, "result": ...}, ...]
+            variables (dict): Maps variable names to their JSON. Inferred
+                              from all the records if None.
+
+        Returns:
+            History: The evaluations as columns
+        """
+
+        history = cls(variables, capacity=max(len(records), 1))
+        history.extend(records)
+        return history
+
+    def _set_variables(self, variables, conditional=()):
+        space = SearchSpace(variables)
+        self.variables = variables
+        self.names = space.names
+        self.conditional = set(space.conditions) | set(conditional)
+        capacity = len(self._result)
+        for name, v_type in zip(space.names, space.types):
+            if name in self.conditional and v_type == "int":
+                v_type = "float"
+            self._columns[name] = np.empty(capacity, dtype=_DTYPES[v_type])
+        for name, choices in space.choices.items():
+            self.dictionaries[name] = list(choices)
+            self._codes[name] = dict(space.codes[name])
+
+    def _infer(self, configs):
+        # Without a schema the columns follow the data: names first seen
+        # late, or missing from some rows, become conditional, and a
+        # column's type widens from int to float to enum as needed.
+        variables, partial = _infer_variables(configs)
+        if self.variables is None:
+            self._set_variables(variables, partial)
+            self._inferred = True
+            return
+        partial.update(name for name in self.names if name not in variables)
+        for name, var in variables.items():
+            if name not in self._columns:
+                self._add_column(name, var)
+            elif var["type"] != self.variables[name]["type"]:
+                self._widen(name, max(var["type"], self.variables[name]["type"],
+                                      key=_TYPE_ORDER.index))
+        for name in partial - self.conditional:
+            if self._columns[name].dtype == np.int64:
+                self._columns[name] = self._columns[name].astype(np.float64)
+            self.conditional = self.conditional | {name}
+
+    def _add_column(self, name, var):
+        self.variables = dict(self.variables, **{name: var})
+        self.names = sorted(self.names + [name])
+        self.conditional = self.conditional | {name}
+        if var["type"] == "enum":
+            self.dictionaries[name] = []
+            self._codes[name] = {}
+            column = np.empty(len(self._result), dtype=_DTYPES["enum"])
+            column[:self._n] = -1
+        else:
+            column = np.empty(len(self._result))
+            column[:self._n] = np.nan
+        self._columns[name] = column
+
+    def _widen(self, name, v_type):
+        column = self._columns[name]
+        if v_type == "float":
+            self._columns[name] = column.astype(np.float64)
+        else:
+            as_int = self.variables[name]["type"] == "int"
+            self.dictionaries[name] = []
+            self._codes[name] = {}
+            codes = [self._encode(name, None if value != value
+                                  else int(value) if as_int else value)
+                     for value in column[:self._n].tolist()]
+            self._columns[name] = np.empty(len(column), dtype=_DTYPES["enum"])
+            self._columns[name][:self._n] = codes
+        var = {"type": v_type}
+        if v_type == "enum":
+            var["values"] = []
+        self.variables = dict(self.variables, **{name: var})
+
+    def _reserve(self, n):
+        capacity = len(self._result)
+        if n <= capacity:
+            return
+        capacity = max(capacity, 1)
+        while capacity < n:
+            capacity *= 2
+        for name, column in self._columns.items():
+            grown = np.empty(capacity, dtype=column.dtype)
+            grown[:self._n] = column[:self._n]
+            self._columns[name] = grown
+        grown = np.empty(capacity)
+        grown[:self._n] = self._result[:self._n]
+        self._result = grown
+
+    def _missing(self, name):
+        # Enum values go through _encode, which maps None to the code -1
+        return None if name in self._codes else np.nan
+
+    def _encode(self, name, value):
+        if value is None:
+            return -1
+        codes = self._codes[name]
+        if value not in codes:
+            codes[value] = len(self.dictionaries[name])
+            self.dictionaries[name].append(value)
+        return codes[value]
+
+    def __len__(self):
+        return self._n
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += self._n
+        if not 0 <= i < self._n:
+            raise IndexError("history index out of range")
+        config = {}
+        for name in self.names:
+            value = self._columns[name][i].item()
+            if name in self.conditional and (value == -1 if name in self._codes
+                                             else value != value):
+                continue
+            if name in self.dictionaries:
+                value = self.dictionaries[name][value]
+            elif name in self.conditional and self.variables[name]["type"] == "int":
+                value = int(value)
+            config[name] = value
+        return {"config": config, "result": self._result[i].item()}
+
+    def append(self, config, result):
+
+        """
+        Adds one evaluation to the end of the history.
+
+        Args:
+            config (dict): Config dict that was evaluated
+            result (float): Loss produced by the configuration
+        """
+
+        if self.variables is None or self._inferred:
+            self._infer([config])
+        self._reserve(self._n + 1)
+        for name in self.names:
+            if name in self.conditional:
+                value = config.get(name, self._missing(name))
+            else:
+                value = config[name]
+            if name in self._codes:
+                value = self._encode(name, value)
+            self._columns[name][self._n] = value
+        self._result[self._n] = result
+        if self._best is None or result < self._result[self._best]:
+            self._best = self._n
+        self._n += 1
+
+    def extend(self, records):
+
+        """
+        Adds many evaluations to the end of the history, filling each
+        column in one vectorized assignment.
+
+        Args:
+            records (list): [{"config": {...}, "result": ...}, ...]
+        """
+
+        if not records:
+            return
+        if self.variables is None or self._inferred:
+            self._infer([record["config"] for record in records])
+        start, stop = self._n, self._n + len(records)
+        self._reserve(stop)
+        for name in self.names:
+            if name in self.conditional:
+                missing = self._missing(name)
+                values = [record["config"].get(name, missing) for record in records]
+            else:
+                values = [record["config"][name] for record in records]
+            if name in self._codes:
+                values = [self._encode(name, value) for value in values]
+            self._columns[name][start:stop] = values
+        self._result[start:stop] = [record["result"] for record in records]
+        best = start + int(np.argmin(self._result[start:stop]))
+        if self._best is None or self._result[best] < self._result[self._best]:
+            self._best = best
+        self._n = stop
+
+    @property
+    def results(self):
+        return self._result[:self._n]
+
+    def column(self, name):
+
+        """
+        Returns the raw column of a variable. Enum columns hold codes into
+        self.dictionaries[name].
+
+        Args:
+            name (str): Name of the variable
+
+        Returns:
+            ndarray: View of the column
+        """
+
+        return self._columns[name][:self._n]
+
+    def to_numpy(self):
+
+        """
+        Exports every column without copying.
+
+        Returns:
+            dict: Maps variable names, and "result", to ndarray views
+        """
+
+        columns = {name: self.column(name) for name in self.names}
+        columns["result"] = self.results
+        return columns
+
+    def to_arrow(self):
+
+        """
+        Exports the history as a pyarrow Table. Numeric columns share
+        memory with the history; enum columns become dictionary arrays.
+        Requires pyarrow.
+
+        Returns:
+            pyarrow.Table: One column per variable plus "result"
+        """
+
+        import pyarrow as pa
+
+        arrays = []
+        for name in self.names:
+            if name in self.dictionaries:
+                codes = self.column(name)
+                arrays.append(pa.DictionaryArray.from_arrays(
+                    pa.array(codes), pa.array(self.dictionaries[name]),
+                    mask=codes < 0 if name in self.conditional else None))
+            else:
+                arrays.append(pa.array(self.column(name)))
+        arrays.append(pa.array(self.results))
+        return pa.Table.from_arrays(arrays, names=self.names + ["result"])
+
+    def to_pandas(self):
+
+        """
+        Exports the history as a pandas DataFrame with categorical enum
+        columns. Requires pandas.
+
+        Returns:
+            pandas.DataFrame: One column per variable plus "result"
+        """
+
+        import pandas as pd
+
+        columns = {}
+        for name in self.names:
+            if name in self.dictionaries:
+                columns[name] = pd.Categorical.from_codes(
+                    self.column(name), categories=self.dictionaries[name])
+            else:
+                columns[name] = self.column(name)
+        columns["result"] = self.results
+        return pd.DataFrame(columns, copy=False)
+
+    def argmin(self):
+
+        """
+        Returns:
+            int: Row of the lowest result, tracked as rows are added
+        """
+
+        return self._best
+
+    def best(self):
+
+        """
+        Returns:
+            JSON/dict: The evaluation with the lowest result, or an empty
+                       dict if the history is empty
+        """
+
+        if self._best is None:
+            return {}
+        return self[self._best]
+
+    def topk(self, k):
+
+        """
+        Finds the k lowest results without sorting the whole column.
+
+        Args:
+            k (int): Number of evaluations to return
+
+        Returns:
+            ndarray: Rows of the k lowest results, best first
+        """
+
+        results = self.results
+        k = min(k, len(results))
+        if k == 0:
+            return np.empty(0, dtype=np.int64)
+        rows = np.argpartition(results, k - 1)[:k]
+        return rows[np.argsort(results[rows])]
+
+    def filter(self, mask):
+
+        """
+        Selects evaluations by a boolean mask or an array of rows, e.g.
+        history.filter(history.column("lr") < 0.01).
+
+        Args:
+            mask (ndarray): Boolean mask of length len(self), or row indices
+
+        Returns:
+            History: A new History holding the selected evaluations
+        """
+
+        selected = History(capacity=1)
+        selected.variables = self.variables
+        selected.names = self.names
+        selected.conditional = self.conditional
+        selected._inferred = self._inferred
+        selected.dictionaries = {name: list(values)
+                                 for name, values in self.dictionaries.items()}
+        selected._codes = {name: dict(codes)
+                           for name, codes in self._codes.items()}
+        selected._columns = {name: self.column(name)[mask].copy()
+                             for name in self.names}
+        selected._result = self.results[mask].copy()
+        selected._n = len(selected._result)
+        if selected._n:
+            selected._best = int(np.argmin(selected._result))
+        return selected
+
+
+class TopK:
+    def __init__(self, k):
+
+        """
+        Keeps only the k evaluations with the lowest results seen so far,
+        in O(k) memory, e.g. as the consumer of Experiment.stream_history.
+
+        Args:
+            k (int): Number of evaluations to keep
+        """
+
+        self.k = k
+        self._heap = []
+        self._seq = itertools.count()
+
+    def __len__(self):
+        return len(self._heap)
+
+    def append(self, config, result):
+
+        """
+        Considers one evaluation.
+
+        Args:
+            config (dict): Config dict that was evaluated
+            result (float): Loss produced by the configuration
+        """
+
+        # Max-heap on the result through negation; the sequence number
+        # breaks ties so that configs are never compared.
+        item = (-result, next(self._seq), config)
+        if len(self._heap) < self.k:
+            heapq.heappush(self._heap, item)
+        elif item[0] > self._heap[0][0]:
+            heapq.heapreplace(self._heap, item)
+
+    def extend(self, records):
+
+        """
+        Considers many evaluations.
+
+        Args:
+            records (list): [{"config": {...}, "result": ...}, ...]
+        """
+
+        for record in records:
+            self.append(record["config"], record["result"])
+
+    def best(self):
+
+        """
+        Returns:
+            list: The kept evaluations as {"config": ..., "result": ...},
+                  best first
+        """
+
+        return [{"config": config, "result": -neg}
+                for neg, _, config in sorted(self._heap,
+                                             key=lambda item: (-item[0], item[1]))]
+
+
+def _source(client):
+    # Remote clients are told apart by server URL, so every Client of a
+    # server shares its histories; in-process clients own their numbering.
+    return getattr(client, "server", None) or client
+
+
+class HistoryCache:
+    def __init__(self):
+
+        """
+        Client-side copies of experiment histories, keyed by the server
+        they came from and experiment_id. Each entry remembers a cursor so
+        that a sync only asks the server for evaluations completed since
+        the previous one.
+
+        A server is known by its URL, or for an in-process client
+        (LocalClient, FileClient, SQLiteBackend) by the client itself,
+        since those all number their experiments from "1". Experiments
+        share the module-level shared_cache, so a new Experiment attached
+        to an existing experiment_id reuses what was already downloaded.
+
+        Losses this process reports are remembered next to each history
+        until the next sync, so that cached answers such as
+        Experiment.get_best_evaluation(cached=True) include them. The
+        history itself only grows on sync, because the server's history
+        cannot be matched against them.
+        """
+
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def _key(self, client, expt_id):
+        return _source(client), str(expt_id)
+
+    def get(self, experiment):
+
+        """
+        Args:
+            experiment (Experiment): The experiment
+
+        Returns:
+            History: The cached history, or None if it was never synced
+        """
+
+        entry = self._entries.get(self._key(experiment.client,
+                                            experiment.experiment_id))
+        return None if entry is None else entry["history"]
+
+    def best(self, experiment):
+
+        """
+        Finds the best evaluation among the cached history and the losses
+        reported from this process since it was last synced.
+
+        Args:
+            experiment (Experiment): The experiment
+
+        Returns:
+            JSON/dict: The evaluation with the lowest result, or None if
+                       the history was never synced
+        """
+
+        entry = self._entries.get(self._key(experiment.client,
+                                            experiment.experiment_id))
+        if entry is None:
+            return None
+        with self._lock:
+            candidates = [record for _, record in entry["reported"]]
+        best = entry["history"].best()
+        if best:
+            candidates.append(best)
+        return min(candidates, key=lambda e: e["result"], default={})
+
+    def record(self, client, evaluations):
+
+        """
+        Remembers losses the server accepted from this process. Histories
+        that were never synced are left alone; their first sync fetches
+        everything.
+
+        Args:
+            client: The client the reports were sent through
+            evaluations (list): Reported evaluations, each with "expt_id",
+                                "config" and "result"
+        """
+
+        with self._lock:
+            for evaluation in evaluations:
+                entry = self._entries.get(self._key(client,
+                                                    evaluation.get("expt_id")))
+                if entry is not None:
+                    entry["recorded"] += 1
+                    entry["reported"].append(
+                        (entry["recorded"], {"config": evaluation["config"],
+                                             "result": evaluation["result"]}))
+
+    def sync(self, experiment):
+
+        """
+        Brings the cached history of an experiment up to date. The server
+        is sent the cursor of the last sync as "since"; a server that
+        supports deltas answers {"evaluations": [...], "cursor": ...} with
+        only the new evaluations. A server that answers with the full list
+        instead is treated as append-only and only the tail past the
+        cached rows is added.
+
+        Args:
+            experiment (Experiment): Submitted experiment to sync
+
+        Returns:
+            History: The up-to-date cached history
+        """
+
+        with self._lock:
+            entry = self._entry(experiment)
+            since, recorded = entry["cursor"], entry["recorded"]
+            response = experiment.client.request(
+                "request_history",
+                {"expt_id": experiment.experiment_id, "since": since})
+            return self._apply(entry, since, recorded, response)
+
+    async def async_sync(self, experiment):
+
+        """
+        Like sync, for an AsyncExperiment.
+
+        Args:
+            experiment (AsyncExperiment): Submitted experiment to sync
+
+        Returns:
+            History: The up-to-date cached history
+        """
+
+        with self._lock:
+            entry = self._entry(experiment)
+            since, recorded = entry["cursor"], entry["recorded"]
+        response = await experiment.client.request(
+            "request_history",
+            {"expt_id": experiment.experiment_id, "since": since})
+        with self._lock:
+            return self._apply(entry, since, recorded, response)
+
+    def _entry(self, experiment):
+        key = self._key(experiment.client, experiment.experiment_id)
+        entry = self._entries.get(key)
+        if entry is None:
+            entry = {"history": History(experiment.data["vars"] or None),
+                     "cursor": 0, "reported": [], "recorded": 0}
+            self._entries[key] = entry
+        return entry
+
+    def _apply(self, entry, since, recorded, response):
+        # Another sync may have moved the cursor while this one waited for
+        # the server; skip the evaluations it already added. Reports
+        # recorded before the request was sent are now in the history.
+        history = entry["history"]
+        if isinstance(response, dict) and "evaluations" in response:
+            history.extend(response["evaluations"][entry["cursor"] - since:])
+            entry["cursor"] = max(entry["cursor"], response["cursor"])
+        else:
+            history.extend(response[len(history):])
+            entry["cursor"] = len(history)
+        entry["reported"] = [(n, record) for n, record in entry["reported"]
+                             if n > recorded]
+        return history
+
+    def clear(self, experiment=None):
+
+        """
+        Drops the cached history of one experiment, or of all of them.
+
+        Args:
+            experiment (Experiment): The experiment, or None for every
+                                     experiment
+        """
+
+        with self._lock:
+            if experiment is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(self._key(experiment.client,
+                                            experiment.experiment_id), None)
+
+
+shared_cache = HistoryCache()
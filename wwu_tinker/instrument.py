@@ -0,0 +1,190 @@
+import bisect
+import threading
+import time
+
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1,
+                   0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0)
+
+
+class Histogram:
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+
+        """
+        Latency histogram with fixed bucket upper bounds in seconds.
+
+        Args:
+            buckets (tuple): Increasing upper bounds of the buckets
+        """
+
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, seconds):
+        self.counts[bisect.bisect_left(self.buckets, seconds)] += 1
+        self.sum += seconds
+        self.count += 1
+
+    def quantile(self, q):
+
+        """
+        Estimates a quantile as the upper bound of the bucket it falls in.
+
+        Args:
+            q (float): Quantile in [0, 1]
+
+        Returns:
+            float: Estimated latency in seconds, inf past the last bucket
+        """
+
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets + (float("inf"),), self.counts):
+            seen += count
+            if seen >= rank and count:
+                return bound
+        return 0.0
+
+
+class Instrumentation:
+    def __init__(self, callback=None, tracer=None, buckets=DEFAULT_BUCKETS):
+
+        """
+        Collects call counts, error counts and latency histograms for every
+        server call and objective evaluation it is attached to. Server calls
+        are broken into phases: "encode" and "decode" (JSON), "http" (the
+        round trip) and, if the server reports it, "server" (time spent
+        answering), so network time is "http" minus "server".
+
+        Attach it with Experiment.instrument(). When nothing is attached
+        the clients skip all of this, so it costs nothing when disabled.
+
+        Args:
+            callback (callable): Called as callback(name, seconds, phases, error)
+                                 after every recorded call
+            tracer: OpenTelemetry tracer, e.g. from
+                    opentelemetry.trace.get_tracer("wwu_tinker"); every
+                    recorded call is exported as a span
+            buckets (tuple): Increasing upper bounds of the histogram buckets
+        """
+
+        self.callback = callback
+        self.tracer = tracer
+        self.buckets = buckets
+        self.calls = {}
+        self.errors = {}
+        self.histograms = {}
+        self._lock = threading.Lock()
+
+    def record(self, name, start, end, phases=None, error=False):
+
+        """
+        Records one call.
+
+        Args:
+            name (str): Endpoint name, or "objective"
+            start (float): time.time() when the call started
+            end (float): time.time() when the call ended
+            phases (dict): Seconds spent in each phase of the call
+            error (bool): Whether the call failed
+        """
+
+        seconds = end - start
+        with self._lock:
+            self.calls[name] = self.calls.get(name, 0) + 1
+            if error:
+                self.errors[name] = self.errors.get(name, 0) + 1
+            self._histogram(name, "total").observe(seconds)
+            for phase, value in (phases or {}).items():
+                self._histogram(name, phase).observe(value)
+        if self.callback is not None:
+            self.callback(name, seconds, phases or {}, error)
+        if self.tracer is not None:
+            span = self.tracer.start_span("tinker." + name,
+                                          start_time=int(start * 1e9))
+            for phase, value in (phases or {}).items():
+                span.set_attribute("tinker.%s_seconds" % phase, value)
+            span.set_attribute("tinker.error", error)
+            span.end(end_time=int(end * 1e9))
+
+    def _histogram(self, name, phase):
+        key = (name, phase)
+        if key not in self.histograms:
+            self.histograms[key] = Histogram(self.buckets)
+        return self.histograms[key]
+
+    def time(self, name):
+
+        """
+        Context manager that records the block it wraps as one call.
+
+        Args:
+            name (str): Name to record the call under
+        """
+
+        return _Timer(self, name)
+
+    def summary(self):
+
+        """
+        Returns:
+            dict: Maps each name to its call and error counts and, per
+                  phase, the mean, p50 and p99 latency in seconds
+        """
+
+        with self._lock:
+            summary = {}
+            for (name, phase), h in sorted(self.histograms.items()):
+                entry = summary.setdefault(name, {
+                    "calls": self.calls.get(name, 0),
+                    "errors": self.errors.get(name, 0)})
+                entry[phase] = {"mean": h.sum / h.count if h.count else 0.0,
+                                "p50": h.quantile(0.5),
+                                "p99": h.quantile(0.99)}
+            return summary
+
+    def to_prometheus(self):
+
+        """
+        Renders every counter and histogram in the Prometheus text
+        exposition format.
+
+        Returns:
+            str: The metrics
+        """
+
+        lines = ["# TYPE tinker_calls_total counter"]
+        with self._lock:
+            for name, count in sorted(self.calls.items()):
+                lines.append('tinker_calls_total{endpoint="%s"} %d' % (name, count))
+            lines.append("# TYPE tinker_errors_total counter")
+            for name, count in sorted(self.errors.items()):
+                lines.append('tinker_errors_total{endpoint="%s"} %d' % (name, count))
+            lines.append("# TYPE tinker_call_seconds histogram")
+            for (name, phase), h in sorted(self.histograms.items()):
+                labels = 'endpoint="%s",phase="%s"' % (name, phase)
+                cumulative = 0
+                for bound, count in zip(h.buckets, h.counts):
+                    cumulative += count
+                    lines.append('tinker_call_seconds_bucket{%s,le="%g"} %d'
+                                 % (labels, bound, cumulative))
+                lines.append('tinker_call_seconds_bucket{%s,le="+Inf"} %d'
+                             % (labels, h.count))
+                lines.append("tinker_call_seconds_sum{%s} %f" % (labels, h.sum))
+                lines.append("tinker_call_seconds_count{%s} %d" % (labels, h.count))
+        return "\n".join(lines) + "\n"
+
+
+class _Timer:
+    def __init__(self, instrumentation, name):
+        self.instrumentation = instrumentation
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.time()
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        self.instrumentation.record(self.name, self.start, time.time(),
+                                    error=exc_type is not None)
@@ -0,0 +1,168 @@
+import json
+import os
+import threading
+import time
+
+
+class Journal:
+    def __init__(self, path, fsync_every=32, fsync_interval=1.0):
+
+        """
+        Append-only, line-per-record log of every configuration issued to
+        and every loss reported by an Experiment. Reports are written here
+        before they are sent, so a loss is never lost when the server is
+        unreachable; pending reports are streamed to the server in bulk by
+        replay. Opening an existing journal rebuilds its state, which lets
+        a crashed run resume without re-running finished evaluations.
+
+        Records are flushed to the OS on every write but only fsynced once
+        fsync_every records or fsync_interval seconds have accumulated, so
+        a power loss can drop at most that many of the latest records.
+
+        Args:
+            path (str): Journal file, created if missing
+            fsync_every (int): Number of records between fsyncs
+            fsync_interval (float): Maximum seconds between fsyncs
+        """
+
+        self.path = path
+        self.fsync_every = fsync_every
+        self.fsync_interval = fsync_interval
+        self.expt_id = None
+        self.issued = {}
+        self.reported = {}
+        self.sent = set()
+        self._lock = threading.Lock()
+        self._unsynced = 0
+        self._last_sync = time.time()
+
+        if os.path.exists(path):
+            with open(path, "r") as f:
+                for line in f:
+                    try:
+                        self._apply(json.loads(line))
+                    except ValueError:
+                        break  # torn final write
+        self._file = open(path, "a")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        self.close()
+
+    def _apply(self, record):
+        kind = record["type"]
+        if kind == "experiment":
+            self.expt_id = record["expt_id"]
+        elif kind == "issue":
+            self.issued[record["eval"]["eval_id"]] = record["eval"]
+        elif kind == "report":
+            self.reported[record["eval"]["eval_id"]] = record["eval"]
+        elif kind == "sent":
+            self.sent.update(record["eval_ids"])
+
+    def _write(self, record):
+        with self._lock:
+            self._apply(record)
+            self._file.write(json.dumps(record) + "\n")
+            self._file.flush()
+            self._unsynced += 1
+            if (self._unsynced >= self.fsync_every
+                    or time.time() - self._last_sync >= self.fsync_interval):
+                self._sync()
+
+    def _sync(self):
+        os.fsync(self._file.fileno())
+        self._unsynced = 0
+        self._last_sync = time.time()
+
+    def record_experiment(self, expt_id):
+
+        """
+        Records the ID of the experiment this journal belongs to.
+
+        Args:
+            expt_id (str): ID of the server-side experiment
+        """
+
+        self._write({"type": "experiment", "expt_id": expt_id})
+
+    def record_issue(self, evaluation):
+
+        """
+        Records a configuration handed out by the server.
+
+        Args:
+            evaluation (JSON/dict): Raw configuration JSON, i.e. Configuration.data
+        """
+
+        self._write({"type": "issue", "eval": evaluation})
+
+    def record_report(self, evaluation):
+
+        """
+        Records a reported loss before it is sent to the server.
+
+        Args:
+            evaluation (JSON/dict): Configuration.data including its "result"
+        """
+
+        self._write({"type": "report", "eval": evaluation})
+
+    def mark_sent(self, eval_ids):
+
+        """
+        Records that reports reached the server.
+
+        Args:
+            eval_ids (list): Evaluation IDs of the delivered reports
+        """
+
+        eval_ids = [e for e in eval_ids if e not in self.sent]
+        if eval_ids:
+            self._write({"type": "sent", "eval_ids": eval_ids})
+
+    def pending(self):
+
+        """
+        Returns:
+            list: Reported evaluations that have not reached the server yet
+        """
+
+        with self._lock:
+            return [e for eval_id, e in self.reported.items()
+                    if eval_id not in self.sent]
+
+    def unfinished(self):
+
+        """
+        Returns:
+            list: Issued evaluations whose loss was never reported
+        """
+
+        with self._lock:
+            return [e for eval_id, e in self.issued.items()
+                    if eval_id not in self.reported]
+
+    def flush(self):
+
+        """
+        Forces every record written so far to disk.
+        """
+
+        with self._lock:
+            self._file.flush()
+            self._sync()
+
+    def close(self):
+
+        """
+        Syncs and closes the journal file.
+        """
+
+        with self._lock:
+            if not self._file.closed:
+                self._file.flush()
+                self._sync()
+                self._file.close()
@@ -0,0 +1,66 @@
+import threading
+import traceback
+
+
+class Heartbeat:
+    def __init__(self, configuration, lease, interval=None):
+
+        """
+        Background thread that keeps the lease of an in-flight
+        Configuration alive by posting to the "heartbeat" endpoint. If the
+        worker dies the heartbeats stop, the lease runs out, and the server
+        can hand the configuration to another worker.
+
+        Args:
+            configuration (Configuration): Configuration being evaluated
+            lease (float): Seconds each heartbeat extends the lease by
+            interval (float): Seconds between heartbeats, a third of the
+                              lease if None
+        """
+
+        self.configuration = configuration
+        self.lease = lease
+        self.interval = interval if interval is not None else lease / 3.0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, tb):
+        self.stop()
+
+    def _run(self):
+        payload = {"expt_id": self.configuration.data.get("expt_id"),
+                   "eval_id": self.configuration.get_eval_id(),
+                   "lease": self.lease}
+        while not self._stop.wait(self.interval):
+            try:
+                self.configuration._get_client().request("heartbeat", payload)
+            except Exception:
+                traceback.print_exc()
+                print("Error: heartbeat for evaluation %s failed"
+                      % payload["eval_id"])
+
+    def start(self):
+
+        """
+        Starts sending heartbeats, unless they were already started.
+
+        Returns:
+            Heartbeat: self
+        """
+
+        if self._thread.ident is None:
+            self._thread.start()
+        return self
+
+    def stop(self):
+
+        """
+        Stops sending heartbeats and waits for the thread to exit.
+        """
+
+        self._stop.set()
+        if self._thread.is_alive():
+            self._thread.join()
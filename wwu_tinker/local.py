@@ -0,0 +1,215 @@
+import itertools
+import threading
+import time
+
+from .optimizers import make_optimizer
+
+ENDPOINTS = ("setup", "request", "report", "report_batch", "report_config",
+             "request_history", "request_best_eval", "heartbeat", "recover")
+
+
+class LocalClient:
+    instrumentation = None
+
+    def __init__(self, seed=None, clock=time.time,
+                 optimizer_factory=make_optimizer):
+
+        """
+        Stands in for Client by answering the tinker endpoints in-process
+        with a local optimizer, so an Experiment can be tuned without a
+        server. Pass it to an Experiment as its client:
+
+            expt = Experiment("local_expt", client=LocalClient())
+
+        Args:
+            seed (int): Seed for the optimizers of every experiment set up
+                        through this client
+            clock (callable): Returns the current time in seconds; used to
+                              expire leases
+            optimizer_factory (callable): Builds the optimizer of a new
+                                          experiment, called like
+                                          optimizers.make_optimizer
+        """
+
+        self.seed = seed
+        self.clock = clock
+        self.optimizer_factory = optimizer_factory
+        self.experiments = {}
+        self._expt_ids = itertools.count(1)
+        self._eval_ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        self.close()
+
+    def request(self, endpoint, payload):
+
+        """
+        Answers a request to one of the server endpoints.
+
+        Args:
+            endpoint (str): Name of the endpoint, e.g. "request" or "report"
+            payload (JSON/dict): Body of the request
+
+        Returns:
+            JSON/dict: The response the server would have sent
+        """
+
+        if endpoint not in ENDPOINTS:
+            raise ValueError("Unknown endpoint \"%s\"" % endpoint)
+        if self.instrumentation is not None:
+            with self.instrumentation.time(endpoint):
+                with self._lock:
+                    return self._handle(endpoint, payload)
+        with self._lock:
+            return self._handle(endpoint, payload)
+
+    def stream(self, endpoint, payload):
+
+        """
+        Iterates over the list an endpoint responds with, like
+        Client.stream.
+
+        Args:
+            endpoint (str): Name of the endpoint, e.g. "request_history"
+            payload (JSON/dict): Body of the request
+
+        Yields:
+            JSON/dict: Each element of the response
+        """
+
+        response = self.request(endpoint, payload)
+        if isinstance(response, dict):
+            response = response.get("evaluations", [response] if response else [])
+        yield from response
+
+    def close(self):
+        pass
+
+    def _handle(self, endpoint, payload):
+        return getattr(self, "_" + endpoint)(payload)
+
+    def _experiment(self, payload):
+        return self.experiments[str(payload["expt_id"])]
+
+    def _setup(self, payload):
+        expt_id = str(next(self._expt_ids))
+        self._add_experiment(expt_id, payload)
+        return {"expt_id": expt_id}
+
+    def _add_experiment(self, expt_id, payload):
+        self.experiments[expt_id] = {
+            "expt_id": expt_id,
+            "data": payload,
+            "optimizer": self.optimizer_factory(
+                payload["optimizer"], payload["vars"], seed=self.seed,
+                options=payload.get("optimizer_options")),
+            "evaluations": {},
+            "completed": [],
+        }
+
+    def _issue(self, evaluation, payload):
+        if payload.get("lease") is not None:
+            evaluation["deadline"] = self.clock() + payload["lease"]
+        else:
+            evaluation.pop("deadline", None)
+        issued = dict(evaluation)
+        issued.pop("deadline", None)
+        return issued
+
+    def _expired(self, expt):
+        now = self.clock()
+        return [e for e in expt["evaluations"].values()
+                if "result" not in e and e.get("deadline", now) < now]
+
+    def _request(self, payload):
+        expt = self._experiment(payload)
+        order_size = payload.get("order_size", 1)
+        configs = [self._issue(e, payload)
+                   for e in self._expired(expt)[:order_size]]
+        for config in self._ask(expt, order_size - len(configs)):
+            evaluation = {"expt_id": str(payload["expt_id"]),
+                          "eval_id": next(self._eval_ids),
+                          "config": config}
+            budget = expt["optimizer"].budget(config)
+            if budget is not None:
+                evaluation["budget"] = budget
+            expt["evaluations"][evaluation["eval_id"]] = evaluation
+            configs.append(self._issue(evaluation, payload))
+        if not configs:
+            return {"configs": []}  # the optimizer ran out, e.g. a full grid
+        if order_size == 1 and len(configs) == 1:
+            return configs[0]
+        return configs
+
+    def _ask(self, expt, n):
+        return expt["optimizer"].ask(n)
+
+    def _heartbeat(self, payload):
+        evaluation = self._experiment(payload)["evaluations"][payload["eval_id"]]
+        if "result" not in evaluation:
+            evaluation["deadline"] = self.clock() + payload["lease"]
+        return {"eval_id": payload["eval_id"]}
+
+    def _recover(self, payload):
+        expt = self._experiment(payload)
+        return [self._issue(e, payload) for e in self._expired(expt)]
+
+    def _report(self, payload):
+        expt = self._experiment(payload)
+        evaluation = expt["evaluations"][payload["eval_id"]]
+        if "result" in evaluation:
+            return {"eval_id": payload["eval_id"]}  # e.g. a replayed report
+        expt["completed"].append(evaluation)
+        evaluation.pop("deadline", None)
+        evaluation["result"] = float(payload["result"])
+        if "metrics" in payload:
+            evaluation["metrics"] = payload["metrics"]
+        self._tell(expt, evaluation)
+        return {"eval_id": payload["eval_id"]}
+
+    def _tell(self, expt, evaluation):
+        expt["optimizer"].tell(evaluation["config"], evaluation["result"])
+        if "metrics" in evaluation:
+            expt["optimizer"].tell_metrics(evaluation["config"],
+                                           evaluation["metrics"])
+
+    def _report_batch(self, payload):
+        for evaluation in payload["evaluations"]:
+            self._report(evaluation)
+        return {"count": len(payload["evaluations"])}
+
+    def _report_config(self, payload):
+        expt = self._experiment(payload)
+        evaluation = {"expt_id": str(payload["expt_id"]),
+                      "eval_id": next(self._eval_ids),
+                      "config": dict(payload["config"]),
+                      "result": float(payload["result"])}
+        if "metrics" in payload:
+            evaluation["metrics"] = payload["metrics"]
+        expt["evaluations"][evaluation["eval_id"]] = evaluation
+        expt["completed"].append(evaluation)
+        self._tell(expt, evaluation)
+        return {"eval_id": evaluation["eval_id"]}
+
+    def _request_history(self, payload):
+        expt = self._experiment(payload)
+        since = payload.get("since")
+        completed = expt["completed"][since or 0:]
+        evaluations = [{"config": e["config"], "result": e["result"]}
+                       for e in completed]
+        for evaluation, e in zip(evaluations, completed):
+            if "metrics" in e:
+                evaluation["metrics"] = e["metrics"]
+        if since is None:
+            return evaluations
+        return {"evaluations": evaluations, "cursor": len(expt["completed"])}
+
+    def _request_best_eval(self, payload):
+        history = self._request_history(payload)
+        if not history:
+            return {}
+        return min(history, key=lambda e: e["result"])
@@ -0,0 +1,618 @@
+import math
+
+import numpy as np
+
+from .cache import config_key
+from .grid import Grid
+from .pareto import ParetoFront, hypervolume_improvement
+from .space import SearchSpace
+
+_erf = np.vectorize(math.erf, otypes=[float])
+
+
+class LocalOptimizer:
+    def __init__(self, variables, seed=None):
+
+        """
+        Base class for optimizers that run in-process instead of on the
+        tinker server. Subclasses produce configurations from the same
+        variable JSON that Experiment.add_var builds.
+
+        Args:
+            variables (dict): Maps variable names to their JSON, i.e. Experiment.data["vars"]
+            seed (int): Seed for the random number generator
+        """
+
+        self.space = SearchSpace(variables)
+        self.variables = variables
+        self.names = self.space.names
+        self.rng = np.random.default_rng(seed)
+
+    def sample(self, n):
+
+        """
+        Draws n points from the unit hypercube, one column per variable
+        in self.names.
+
+        Args:
+            n (int): Number of points to draw
+
+        Returns:
+            ndarray: Array of shape (n, len(self.names)) in [0, 1)
+        """
+
+        raise NotImplementedError
+
+    def decode(self, u):
+
+        """
+        Maps points of the unit hypercube to variable values, see
+        SearchSpace.decode.
+
+        Args:
+            u (ndarray): Array of shape (n, len(self.names)) in [0, 1)
+
+        Returns:
+            list: One config dict per row of u
+        """
+
+        return self.space.decode(u)
+
+    def encode(self, configs):
+
+        """
+        Maps config dicts back to the unit hypercube, see
+        SearchSpace.encode.
+
+        Args:
+            configs (list): Config dicts mapping variable names to values
+
+        Returns:
+            ndarray: Array of shape (len(configs), len(self.names))
+        """
+
+        return self.space.encode(configs)
+
+    def snap(self, u):
+
+        """
+        Moves points of the unit hypercube to the middle of the cell of
+        the discrete value they decode to, leaving continuous floats alone.
+
+        Args:
+            u (ndarray): Array of shape (n, len(self.names)) in [0, 1)
+
+        Returns:
+            ndarray: Snapped copy of u
+        """
+
+        return self.space.snap(u)
+
+    def ask(self, n=1):
+
+        """
+        Proposes the next n configurations.
+
+        Args:
+            n (int): Number of configurations to propose
+
+        Returns:
+            list: Config dicts mapping variable names to values
+        """
+
+        return self.decode(self.sample(n))
+
+    def budget(self, config):
+
+        """
+        Returns the resource budget assigned to a proposed configuration,
+        for optimizers that allocate one.
+
+        Args:
+            config (dict): Config dict proposed by ask
+
+        Returns:
+            int/float: The budget, or None
+        """
+
+        return None
+
+    def tell(self, config, result):
+
+        """
+        Informs the optimizer of the result of an evaluation. Optimizers
+        that do not learn from results ignore it.
+
+        Args:
+            config (dict): Config dict that was evaluated
+            result (float): Loss produced by the configuration
+        """
+
+        pass
+
+    def tell_metrics(self, config, metrics):
+
+        """
+        Informs the optimizer of every metric of an evaluation reported
+        with Configuration.report_metrics, after tell() has been called
+        with its loss. Optimizers that only learn from the loss ignore it.
+
+        Args:
+            config (dict): Config dict that was evaluated
+            metrics (dict): Maps metric names to their values
+        """
+
+        pass
+
+
+class RandomOptimizer(LocalOptimizer):
+    def sample(self, n):
+        return self.rng.random((n, len(self.names)))
+
+
+class LatinHypercubeOptimizer(LocalOptimizer):
+    def __init__(self, variables, seed=None, block_size=100):
+
+        """
+        Hands out the points of Latin hypercube designs of block_size
+        points: every variable's range is cut into block_size strata and
+        each stratum is used exactly once per block. The design is walked
+        across calls to ask, so the stratification holds however many
+        configurations each call asks for, one at a time included.
+
+        Args:
+            variables (dict): Maps variable names to their JSON, i.e. Experiment.data["vars"]
+            seed (int): Seed for the random number generator
+            block_size (int): Number of points per design; set it to the
+                              number of trials to cover them with one design
+        """
+
+        super().__init__(variables, seed=seed)
+        self.block_size = block_size
+        self._design = np.empty((0, len(self.names)))
+        self._position = 0
+
+    def _draw(self, n):
+        d = len(self.names)
+        strata = np.argsort(self.rng.random((n, d)), axis=0)
+        return (strata + self.rng.random((n, d))) / n
+
+    def sample(self, n):
+        rows = []
+        while n > 0:
+            if self._position == len(self._design):
+                self._design = self._draw(self.block_size)
+                self._position = 0
+            rows.append(self._design[self._position:self._position + n])
+            self._position += len(rows[-1])
+            n -= len(rows[-1])
+        if not rows:
+            return np.empty((0, len(self.names)))
+        return np.vstack(rows)
+
+
+class GridOptimizer(LocalOptimizer):
+    def __init__(self, variables, seed=None, grid=None):
+
+        """
+        Walks the Cartesian product of every variable's levels in order.
+        Int and float variables are stepped by their step_size; once the
+        grid is exhausted no more configurations are proposed.
+
+        Args:
+            variables (dict): Maps variable names to their JSON, i.e. Experiment.data["vars"]
+            seed (int): Unused, accepted for a uniform constructor
+            grid (Grid): Part of the grid to walk, e.g. a shard or a slice
+                         to resume from. Defaults to the whole grid.
+        """
+
+        super().__init__(variables, seed=seed)
+        self.grid = grid if grid is not None else Grid(self.space)
+        self.position = 0
+
+    def ask(self, n=1):
+        configs = self.grid.batch(self.position, self.position + n)
+        self.position += len(configs)
+        return configs
+
+
+class BayesianOptimizer(LocalOptimizer):
+    def __init__(self, variables, seed=None, n_initial=5, n_candidates=1000,
+                 length_scale=0.2, noise=1e-4, xi=0.01):
+
+        """
+        Proposes configurations by maximizing expected improvement under a
+        Gaussian process surrogate of the loss. Ints and stepped floats are
+        modeled on their position in the range, enums are one-hot encoded.
+
+        The kernel hyperparameters are fixed, so each result only extends
+        the inverse Cholesky factor of the kernel matrix by one row
+        (O(n^2)) instead of refactorizing it (O(n^3)).
+
+        Candidates that land on a point already evaluated, or already
+        picked for the same batch, are dropped, and once no candidate is
+        expected to improve on the best loss a random one is proposed, so
+        the same configuration is not evaluated over and over.
+
+        Args:
+            variables (dict): Maps variable names to their JSON, i.e. Experiment.data["vars"]
+            seed (int): Seed for the random number generator
+            n_initial (int): Number of results to collect with random search
+                             before the surrogate is used
+            n_candidates (int): Number of random points the acquisition
+                                function is evaluated on per proposal
+            length_scale (float): Length scale of the RBF kernel in the unit hypercube
+            noise (float): Observation noise added to the kernel diagonal
+            xi (float): Exploration margin for expected improvement
+        """
+
+        super().__init__(variables, seed=seed)
+        self.n_initial = n_initial
+        self.n_candidates = n_candidates
+        self.length_scale = length_scale
+        self.noise = noise
+        self.xi = xi
+
+        self._X = np.empty((64, self.space.n_features))
+        self._Linv = np.zeros((64, 64))
+        self._y = np.empty(64)
+        self._n = 0
+        self._configs = []
+        self._seen = set()
+
+    def sample(self, n):
+        return self.rng.random((n, len(self.names)))
+
+    def _keys(self, u):
+        # Rows of the unit hypercube rounded so that a configuration and
+        # its decode/encode round trip compare equal
+        return [row.tobytes() for row in np.round(u * 1e9).astype(np.int64)]
+
+    def _features(self, u):
+        return self.space.features(u)
+
+    def _kernel(self, A, B):
+        sq = (np.sum(A ** 2, axis=1)[:, None] + np.sum(B ** 2, axis=1)[None, :]
+              - 2 * A @ B.T)
+        return np.exp(-np.maximum(sq, 0) / (2 * self.length_scale ** 2))
+
+    def _reserve(self, n):
+        capacity = len(self._y)
+        if n <= capacity:
+            return
+        while capacity < n:
+            capacity *= 2
+        X = np.empty((capacity, self._X.shape[1]))
+        X[:self._n] = self._X[:self._n]
+        Linv = np.zeros((capacity, capacity))
+        Linv[:self._n, :self._n] = self._Linv[:self._n, :self._n]
+        y = np.empty((capacity,) + self._y.shape[1:])
+        y[:self._n] = self._y[:self._n]
+        self._X, self._Linv, self._y = X, Linv, y
+
+    def _extend(self, n, x, result):
+
+        """
+        Writes point n of the surrogate into the buffers. If K = L L^T
+        gains a row [k^T, c], L gains the row [l^T, d] with l = L^-1 k and
+        d = sqrt(c - l^T l), so L^-1 gains the row [-l^T L^-1 / d, 1 / d].
+        Rows past n are left untouched.
+        """
+
+        self._reserve(n + 1)
+        Linv = self._Linv[:n, :n]
+        k = self._kernel(self._X[:n], x[None, :])[:, 0]
+        l = Linv @ k
+        d = np.sqrt(max(1.0 + self.noise - l @ l, self.noise))
+        self._Linv[n, :n] = -(l @ Linv) / d
+        self._Linv[n, n] = 1.0 / d
+        self._X[n] = x
+        self._y[n] = result
+
+    def _posterior(self, n, z_y, F):
+        Linv = self._Linv[:n, :n]
+        V = Linv @ self._kernel(self._X[:n], F)
+        mu = V.T @ (Linv @ z_y)
+        sigma = np.sqrt(np.maximum(1.0 - np.sum(V ** 2, axis=0), 1e-12))
+        return mu, sigma
+
+    def _expected_improvement(self, n, F):
+        y = self._y[:n]
+        mean, std = y.mean(), y.std() or 1.0
+        z_y = (y - mean) / std
+        mu, sigma = self._posterior(n, z_y, F)
+        improvement = z_y.min() - mu - self.xi
+        z = improvement / sigma
+        cdf = 0.5 * (1 + _erf(z / np.sqrt(2)))
+        pdf = np.exp(-0.5 * z ** 2) / np.sqrt(2 * np.pi)
+        return improvement * cdf + sigma * pdf
+
+    def _canonical(self, u):
+        u = self.snap(u)
+        if self.space.conditional:
+            # Inactive dimensions do not change the configuration
+            u = self.encode(self.decode(u))
+        return u
+
+    def _unseen(self, u, seen):
+        return np.array([key not in seen for key in self._keys(u)], dtype=bool)
+
+    def _around(self, centers):
+        # Reflects off the bounds rather than clipping, which would pile
+        # candidates onto the boundary
+        u = np.abs(centers + self.rng.normal(0, 0.05, centers.shape))
+        return np.clip(np.where(u >= 1, 2 - u, u), 0, 1 - 1e-9)
+
+    def _candidates(self, seen):
+        n_local = self.n_candidates // 4
+        u = self.rng.random((self.n_candidates - n_local, len(self.names)))
+        if self._n:
+            best = self.encode([self._configs[int(np.argmin(self._y[:self._n]))]])
+            u = np.vstack([u, self._around(np.repeat(best, n_local, axis=0))])
+        u = self._canonical(u)
+        return u[self._unseen(u, seen)]
+
+    def _fallback(self, seen):
+        u = self._canonical(self.sample(self.n_candidates))
+        unseen = np.flatnonzero(self._unseen(u, seen))
+        return u[unseen[0] if len(unseen) else 0]
+
+    def ask(self, n=1):
+
+        """
+        Proposes the next n configurations. A batch is built with the
+        constant liar heuristic: each chosen point is written past the end
+        of the surrogate with the best loss so far as its result, which
+        pushes the remaining picks elsewhere, and is dropped afterwards.
+        """
+
+        if self._n < self.n_initial:
+            return self.decode(self.sample(n))
+        picks = []
+        seen = set(self._seen)
+        best_y = self._y[:self._n].min()
+        for i in range(n):
+            u = self._candidates(seen)
+            pick = None
+            if len(u):
+                ei = self._expected_improvement(self._n + i, self._features(u))
+                best = int(np.argmax(ei))
+                if ei[best] > 1e-9:
+                    pick = u[best]
+            if pick is None:
+                pick = self._fallback(seen)
+            picks.append(pick)
+            seen.update(self._keys(pick[None, :]))
+            self._extend(self._n + i, self._features(pick[None, :])[0], best_y)
+        return self.decode(np.array(picks))
+
+    def tell(self, config, result):
+        x = self._features(self.encode([config]))[0]
+        self._extend(self._n, x, float(result))
+        self._n += 1
+        self._configs.append(config)
+        self._seen.update(self._keys(self.snap(self.encode([config]))))
+
+
+class HyperbandOptimizer(LocalOptimizer):
+    def __init__(self, variables, seed=None, resource=None,
+                 reduction_factor=3):
+
+        """
+        Asynchronous successive halving (ASHA), the parallel form of
+        Hyperband. One int or float variable is treated as a resource
+        budget (e.g. epochs). New configurations start on the lowest rung
+        with the minimum of its range, and whenever a worker asks for work
+        the best 1/reduction_factor of any rung that have not yet been
+        promoted are resumed on the next rung with reduction_factor times
+        the budget, up to the maximum of the range as the last rung.
+        Promotions never wait for a rung to fill up, so no worker sits idle.
+
+        Args:
+            variables (dict): Maps variable names to their JSON, i.e. Experiment.data["vars"]
+            seed (int): Seed for the random number generator
+            resource (str): Name of the variable used as the budget; its
+                            range must start above 0
+            reduction_factor (int): Budget multiplier between rungs, greater
+                                    than 1; only 1/reduction_factor of a rung
+                                    is promoted
+        """
+
+        super().__init__(variables, seed=seed)
+        if resource not in variables or variables[resource]["type"] == "enum":
+            raise ValueError("resource must name an int or float variable")
+        lo, hi = variables[resource]["range"]
+        if lo <= 0:
+            raise ValueError("the range of the resource must start above 0")
+        if reduction_factor <= 1:
+            raise ValueError("reduction_factor must be greater than 1")
+        self.resource = resource
+        self.reduction_factor = reduction_factor
+
+        self.rungs = [lo]
+        while self.rungs[-1] * reduction_factor < hi:
+            self.rungs.append(self.rungs[-1] * reduction_factor)
+        if self.rungs[-1] < hi:
+            self.rungs.append(hi)
+
+        others = {name: var for name, var in variables.items()
+                  if name != resource}
+        self._sampler = RandomOptimizer(others, seed=seed)
+        self._results = [[] for _ in self.rungs]
+        self._promoted = [set() for _ in self.rungs]
+
+    def _promotion(self):
+        for k in range(len(self.rungs) - 2, -1, -1):
+            results = self._results[k]
+            n_promote = len(results) // self.reduction_factor
+            if n_promote == 0:
+                continue
+            for loss, key, config in sorted(results, key=lambda r: r[0])[:n_promote]:
+                if key not in self._promoted[k]:
+                    self._promoted[k].add(key)
+                    config = dict(config)
+                    config[self.resource] = self.rungs[k + 1]
+                    return config
+        return None
+
+    def ask(self, n=1):
+        configs = []
+        for _ in range(n):
+            config = self._promotion()
+            if config is None:
+                config = self._sampler.ask(1)[0]
+                config[self.resource] = self.rungs[0]
+            configs.append(config)
+        return configs
+
+    def budget(self, config):
+        return config[self.resource]
+
+    def tell(self, config, result):
+        if config[self.resource] not in self.rungs:
+            return
+        k = self.rungs.index(config[self.resource])
+        others = {name: value for name, value in config.items()
+                  if name != self.resource}
+        self._results[k].append((float(result), config_key(others), config))
+
+
+class ParetoOptimizer(BayesianOptimizer):
+    def __init__(self, variables, seed=None, objectives=None, maximize=(),
+                 reference=None, kappa=1.0, n_initial=5, n_candidates=1000,
+                 length_scale=0.2, noise=1e-4):
+
+        """
+        Proposes configurations that trade several metrics off against each
+        other, e.g. loss against latency, by growing the hypervolume of the
+        Pareto front. Each objective gets a Gaussian process surrogate;
+        they share the kernel matrix, so the inverse Cholesky factor is
+        extended once per result for all of them.
+
+        Candidates are scored by the hypervolume the front would gain if
+        they landed on their optimistic estimate, the mean minus kappa
+        standard deviations of every surrogate. A batch is built by adding
+        each pick's estimate to the front and to the surrogates before the
+        next pick, so the batch spreads along the front.
+
+        Only results reported with Configuration.report_metrics that carry
+        every objective are used; plain losses are ignored.
+
+        Args:
+            variables (dict): Maps variable names to their JSON, i.e. Experiment.data["vars"]
+            seed (int): Seed for the random number generator
+            objectives (list): Metric names, e.g. ["loss", "latency_ms"]
+            maximize (tuple): Names of the objectives where larger is better
+            reference (dict): Worst value of interest of every objective. By
+                              default the worst value seen so far, plus a
+                              tenth of the observed range.
+            kappa (float): Standard deviations subtracted for the
+                           optimistic estimate
+            n_initial (int): Number of results to collect with random search
+                             before the surrogates are used
+            n_candidates (int): Number of random points scored per proposal
+            length_scale (float): Length scale of the RBF kernel in the unit hypercube
+            noise (float): Observation noise added to the kernel diagonal
+        """
+
+        if not objectives:
+            raise ValueError("the pareto optimizer needs a list of objectives")
+        super().__init__(variables, seed=seed, n_initial=n_initial,
+                         n_candidates=n_candidates, length_scale=length_scale,
+                         noise=noise)
+        self.objectives = list(objectives)
+        self.front = ParetoFront(self.objectives, maximize=maximize)
+        self.reference = None
+        if reference is not None:
+            self.reference = self.front._reference(reference)
+        self.kappa = kappa
+        self._y = np.empty((64, len(self.objectives)))
+
+    def _reference_point(self, y):
+        if self.reference is not None:
+            return self.reference
+        lo, hi = y.min(axis=0), y.max(axis=0)
+        return hi + 0.1 * np.where(hi > lo, hi - lo, np.abs(hi) + 1.0)
+
+    def _candidates(self, seen):
+        n_local = self.n_candidates // 4
+        u = self.rng.random((self.n_candidates - n_local, len(self.names)))
+        centers = self.encode([record["config"] for record in self.front])
+        if len(centers):
+            pick = self.rng.integers(len(centers), size=n_local)
+            u = np.vstack([u, self._around(centers[pick])])
+        u = self._canonical(u)
+        return u[self._unseen(u, seen)]
+
+    def ask(self, n=1):
+        if self._n < self.n_initial:
+            return self.decode(self.sample(n))
+        reference = self._reference_point(self._y[:self._n])
+        front = self.front.points()
+        picks = []
+        seen = set(self._seen)
+        for i in range(n):
+            u = self._candidates(seen)
+            if not len(u):
+                u = self._fallback(seen)[None, :]
+            F = self._features(u)
+            y = self._y[:self._n + i]
+            mean, std = y.mean(axis=0), y.std(axis=0)
+            std = np.where(std > 0, std, 1.0)
+            mu, sigma = self._posterior(self._n + i, (y - mean) / std, F)
+            optimistic = mean + std * (mu - self.kappa * sigma[:, None])
+            gain = hypervolume_improvement(front, optimistic, reference)
+            best = int(np.argmax(gain)) if gain.max() > 0 else int(np.argmax(sigma))
+            picks.append(u[best])
+            seen.update(self._keys(u[best:best + 1]))
+            self._extend(self._n + i, F[best], mean + std * mu[best])
+            front = np.vstack([front, optimistic[best]])
+        return self.decode(np.array(picks))
+
+    def tell(self, config, result):
+        pass
+
+    def tell_metrics(self, config, metrics):
+        if not all(name in metrics for name in self.objectives):
+            return
+        y = np.array(self.front._signed(metrics))
+        self._extend(self._n, self._features(self.encode([config]))[0], y)
+        self._n += 1
+        self._configs.append(config)
+        self._seen.update(self._keys(self.snap(self.encode([config]))))
+        self.front.add(metrics, {"config": config, "metrics": metrics})
+
+
+# "horde" is scheduled by the tinker server itself; locally it falls back
+# to plain random sampling.
+OPTIMIZERS = {"random": RandomOptimizer,
+              "latin_hyper": LatinHypercubeOptimizer,
+              "grid": GridOptimizer,
+              "bayesian": BayesianOptimizer,
+              "horde": RandomOptimizer,
+              "hyperband": HyperbandOptimizer,
+              "pareto": ParetoOptimizer}
+
+
+def make_optimizer(name, variables, seed=None, options=None):
+
+    """
+    Builds the local optimizer registered under one of the names accepted
+    by Experiment.set_optimizer.
+
+    Args:
+        name (str): Optimizer name
+        variables (dict): Maps variable names to their JSON, i.e. Experiment.data["vars"]
+        seed (int): Seed for the random number generator
+        options (dict): Extra keyword arguments for the optimizer, as
+                        stored by Experiment.set_optimizer
+
+    Returns:
+        LocalOptimizer: The optimizer, or a RandomOptimizer if name has no
+                        local implementation
+    """
+
+    if name not in OPTIMIZERS:
+        print("Warning: no local \"%s\" optimizer, using random search" % name)
+        name = "random"
+    return OPTIMIZERS[name](variables, seed=seed, **(options or {}))
@@ -0,0 +1,274 @@
+import bisect
+
+import numpy as np
+
+
+class ParetoFront:
+    def __init__(self, objectives, maximize=()):
+
+        """
+        Keeps the evaluations that no other evaluation beats on every
+        metric at once, updated one result at a time as they come in, e.g.
+        as the consumer of Experiment.stream_history.
+
+        Only the current front is stored. With two objectives it is kept
+        sorted on the first, so the second strictly decreases along it: a
+        new point is checked against its predecessor by binary search, and
+        the points it dominates are the run right after it, making each
+        insertion O(log n) plus the points removed. With more objectives a
+        new point is compared against the front only, never the history.
+        Reading the front never recomputes it.
+
+        Points that tie an existing one on every metric are left out, so
+        the front holds distinct values.
+
+        Args:
+            objectives (list): Metric names, e.g. ["loss", "latency_ms"]
+            maximize (tuple): Names of the objectives where larger is
+                              better; the others are minimized
+        """
+
+        self.objectives = list(objectives)
+        self.maximize = set(maximize)
+        self._sign = np.array([-1.0 if name in self.maximize else 1.0
+                               for name in self.objectives])
+        self._points = []
+        self._keys = []
+        self._records = []
+
+    def __len__(self):
+        return len(self._points)
+
+    def __iter__(self):
+        return iter(self._records)
+
+    def _signed(self, metrics):
+        return tuple((float(metrics[name]) * sign).item()
+                     for name, sign in zip(self.objectives, self._sign))
+
+    def add(self, metrics, record=None):
+
+        """
+        Considers one evaluation.
+
+        Args:
+            metrics (dict): Maps every objective name to its value
+            record: What front() returns for this evaluation; metrics if None
+
+        Returns:
+            bool: Whether the evaluation entered the front
+        """
+
+        point = self._signed(metrics)
+        record = metrics if record is None else record
+        if len(self.objectives) == 2:
+            return self._add_2d(point, record)
+        for other in self._points:
+            if all(a <= b for a, b in zip(other, point)):
+                return False
+        keep = [i for i, other in enumerate(self._points)
+                if not all(a <= b for a, b in zip(point, other))]
+        self._points = [self._points[i] for i in keep] + [point]
+        self._records = [self._records[i] for i in keep] + [record]
+        return True
+
+    def _add_2d(self, point, record):
+        i = bisect.bisect_right(self._keys, point[0])
+        if i and self._points[i - 1][1] <= point[1]:
+            return False
+        start = i - 1 if i and self._keys[i - 1] == point[0] else i
+        stop = i
+        while stop < len(self._points) and self._points[stop][1] >= point[1]:
+            stop += 1
+        self._points[start:stop] = [point]
+        self._keys[start:stop] = [point[0]]
+        self._records[start:stop] = [record]
+        return True
+
+    def append(self, config, metrics):
+
+        """
+        Considers one evaluation.
+
+        Args:
+            config (dict): Config dict that was evaluated
+            metrics (dict): Maps every objective name to its value
+        """
+
+        self.add(metrics, {"config": config, "metrics": metrics})
+
+    def extend(self, records):
+
+        """
+        Considers many evaluations. Records without a value for every
+        objective, e.g. ones reported with report_loss, are skipped.
+
+        Args:
+            records (list): [{"config": {...}, "result": ..., "metrics": {...}}, ...]
+        """
+
+        for record in records:
+            metrics = record.get("metrics")
+            if metrics is not None and all(name in metrics
+                                           for name in self.objectives):
+                self.add(metrics, record)
+
+    def dominated(self, metrics):
+
+        """
+        Checks whether the front already holds an evaluation at least as
+        good on every objective, in O(log n) with two objectives.
+
+        Args:
+            metrics (dict): Maps every objective name to its value
+
+        Returns:
+            bool: True if metrics would not enter the front
+        """
+
+        point = self._signed(metrics)
+        if len(self.objectives) == 2:
+            i = bisect.bisect_right(self._keys, point[0])
+            return bool(i) and self._points[i - 1][1] <= point[1]
+        return any(all(a <= b for a, b in zip(other, point))
+                   for other in self._points)
+
+    def front(self):
+
+        """
+        Returns:
+            list: The records of the non-dominated evaluations, sorted on
+                  the first objective when there are two
+        """
+
+        return list(self._records)
+
+    def points(self):
+
+        """
+        Returns:
+            ndarray: The front as an array of shape (len(self), n_objectives)
+                     in minimization form, i.e. maximized objectives negated
+        """
+
+        return np.array(self._points, dtype=float).reshape(-1, len(self.objectives))
+
+    def _reference(self, reference):
+        if isinstance(reference, dict):
+            reference = [reference[name] for name in self.objectives]
+        return np.asarray(reference, dtype=float) * self._sign
+
+    def hypervolume(self, reference):
+
+        """
+        Measures the region of objective space the front dominates, bounded
+        by a reference point worse than every point of interest. It only
+        grows as better trade-offs are found.
+
+        Args:
+            reference (dict or list): Value of every objective, by name or
+                                      in objective order
+
+        Returns:
+            float: The hypervolume
+        """
+
+        return hypervolume(self.points(), self._reference(reference))
+
+    def improvement(self, candidates, reference):
+
+        """
+        Measures how much the hypervolume would grow if each candidate
+        were added to the front.
+
+        Args:
+            candidates (list): Metric dicts mapping every objective to its value
+            reference (dict or list): Value of every objective, by name or
+                                      in objective order
+
+        Returns:
+            ndarray: One hypervolume improvement per candidate
+        """
+
+        points = np.array([self._signed(c) for c in candidates], dtype=float)
+        points = points.reshape(-1, len(self.objectives))
+        return hypervolume_improvement(self.points(), points,
+                                       self._reference(reference))
+
+
+def hypervolume(points, reference):
+
+    """
+    Computes the hypervolume dominated by a set of points, all objectives
+    minimized. Two objectives take a single sweep; more are sliced along
+    the last objective, which suits the small fronts seen in tuning.
+
+    Args:
+        points (ndarray): Array of shape (n, d)
+        reference (ndarray): Upper bound of every objective, shape (d,)
+
+    Returns:
+        float: The hypervolume
+    """
+
+    reference = np.asarray(reference, dtype=float)
+    points = np.asarray(points, dtype=float).reshape(-1, len(reference))
+    return _hypervolume(points[np.all(points < reference, axis=1)], reference)
+
+
+def _hypervolume(points, reference):
+    if not len(points):
+        return 0.0
+    if points.shape[1] == 1:
+        return float(reference[0] - points[:, 0].min())
+    if points.shape[1] == 2:
+        points = points[np.lexsort((points[:, 1], points[:, 0]))]
+        widths = np.diff(np.append(points[:, 0], reference[0]))
+        heights = reference[1] - np.minimum.accumulate(points[:, 1])
+        return float(np.sum(widths * heights))
+    points = points[np.argsort(points[:, -1])]
+    tops = np.append(points[1:, -1], reference[-1])
+    volume = 0.0
+    for i in range(len(points)):
+        if tops[i] > points[i, -1]:
+            volume += (tops[i] - points[i, -1]) * _hypervolume(points[:i + 1, :-1],
+                                                             reference[:-1])
+    return volume
+
+
+def hypervolume_improvement(front, candidates, reference):
+
+    """
+    Computes, for each candidate, how much adding it would grow the
+    hypervolume of a front, all objectives minimized. The part of a
+    candidate's box that the front already covers is the hypervolume of
+    the front clipped to that box, which for two objectives is computed
+    for every candidate at once.
+
+    Args:
+        front (ndarray): Non-dominated points, shape (n, d)
+        candidates (ndarray): Points to score, shape (m, d)
+        reference (ndarray): Upper bound of every objective, shape (d,)
+
+    Returns:
+        ndarray: Improvement of every candidate, shape (m,)
+    """
+
+    reference = np.asarray(reference, dtype=float)
+    front = np.asarray(front, dtype=float).reshape(-1, len(reference))
+    front = front[np.all(front < reference, axis=1)]
+    candidates = np.minimum(np.asarray(candidates, dtype=float), reference)
+    own = np.prod(reference - candidates, axis=1)
+    if not len(front):
+        return own
+    if len(reference) == 2:
+        front = front[np.lexsort((front[:, 1], front[:, 0]))]
+        x = np.maximum(front[None, :, 0], candidates[:, 0:1])
+        y = np.maximum(np.minimum.accumulate(front[:, 1])[None, :],
+                       candidates[:, 1:2])
+        widths = np.diff(np.hstack([x, np.full((len(x), 1), reference[0])]), axis=1)
+        covered = np.sum(widths * (reference[1] - y), axis=1)
+    else:
+        covered = np.array([_hypervolume(np.maximum(front, c), reference)
+                            for c in candidates])
+    return np.maximum(own - covered, 0.0)
@@ -0,0 +1,149 @@
+import queue
+import threading
+import traceback
+
+_DONE = object()
+
+
+class Prefetcher:
+    def __init__(self, experiment, queue_size=4, n_configs=None,
+                 report_batch_size=16, flush_interval=0.5):
+
+        """
+        Iterates over configurations of an Experiment while a background
+        thread keeps a bounded queue of the next ones filled. Losses
+        reported through config.report_loss are queued and flushed to the
+        server in batches by a second thread, so the objective never waits
+        on the network.
+
+        Configurations still sitting in the queue when the Prefetcher is
+        closed were issued by the server but are never evaluated.
+
+        Args:
+            experiment (Experiment): Submitted experiment to draw configurations from
+            queue_size (int): Number of configurations to keep ready
+            n_configs (int): Total number of configurations to hand out.
+                             Iterates until closed if None.
+            report_batch_size (int): Maximum number of losses sent per POST
+            flush_interval (float): Seconds to wait for more losses before
+                                    flushing a partial batch
+        """
+
+        self.experiment = experiment
+        self.queue_size = queue_size
+        self.n_configs = n_configs
+        self.report_batch_size = report_batch_size
+        self.flush_interval = flush_interval
+
+        self._configs = queue.Queue(maxsize=queue_size)
+        self._reports = queue.Queue()
+        self._stop = threading.Event()
+        self._error = None
+        self._closed = False
+
+        self._fetcher = threading.Thread(target=self._fetch, daemon=True)
+        self._flusher = threading.Thread(target=self._flush, daemon=True)
+        self._fetcher.start()
+        self._flusher.start()
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self._closed:
+            raise StopIteration
+        config = self._configs.get()
+        if config is _DONE:
+            self._configs.put(_DONE)
+            if self._error is not None:
+                raise self._error
+            raise StopIteration
+        return config
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        self.close()
+
+    def _put(self, item):
+        while not self._stop.is_set():
+            try:
+                self._configs.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _fetch(self):
+        fetched = 0
+        try:
+            while not self._stop.is_set():
+                if self.n_configs is not None and fetched >= self.n_configs:
+                    break
+                n = self.queue_size - self._configs.qsize()
+                if self.n_configs is not None:
+                    n = min(n, self.n_configs - fetched)
+                configs = self.experiment.next_configurations(max(n, 1))
+                if not configs:
+                    break
+                for config in configs:
+                    config._reporter = self._reports.put
+                    if not self._put(config):
+                        return
+                    fetched += 1
+        except Exception as e:
+            self._error = e
+        finally:
+            self._put(_DONE)
+
+    def _flush(self):
+        while True:
+            config = self._reports.get()
+            if config is _DONE:
+                self._reports.task_done()
+                return
+            batch = [config]
+            done = False
+            while len(batch) < self.report_batch_size:
+                try:
+                    config = self._reports.get(timeout=self.flush_interval)
+                except queue.Empty:
+                    break
+                if config is _DONE:
+                    done = True
+                    break
+                batch.append(config)
+            try:
+                self.experiment.report_losses(
+                    [(c, c.data["result"]) for c in batch])
+            except Exception:
+                traceback.print_exc()
+                print("Error: failed to report %d losses" % len(batch))
+            for _ in range(len(batch) + done):
+                self._reports.task_done()
+            if done:
+                return
+
+    def drain(self):
+
+        """
+        Blocks until every loss reported so far has been sent to the server.
+        """
+
+        self._reports.join()
+
+    def close(self):
+
+        """
+        Stops prefetching, flushes all reported losses and waits for
+        both background threads to finish.
+        """
+
+        if self._closed:
+            return
+        self._closed = True
+        self._stop.set()
+        self._fetcher.join()
+        self._reports.put(_DONE)
+        self._flusher.join()
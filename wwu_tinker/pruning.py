@@ -0,0 +1,260 @@
+import bisect
+import os
+import threading
+from multiprocessing.connection import Client, Listener
+
+
+class Pruner:
+    def __init__(self):
+
+        """
+        Base class for early-stopping rules. A Pruner keeps the learning
+        curves reported through Configuration.report_intermediate for
+        every trial of an Experiment, and decides locally whether a trial
+        is doing badly enough to stop.
+        """
+
+        self.curves = {}
+        self._lock = threading.Lock()
+
+    def report(self, eval_id, step, loss):
+
+        """
+        Records an intermediate loss of a trial.
+
+        Args:
+            eval_id (str): Evaluation ID of the trial
+            step (int): Training step or epoch the loss was measured at
+            loss (float): Loss at that step
+        """
+
+        with self._lock:
+            self.curves.setdefault(eval_id, {})[step] = loss
+            self._record(eval_id, step, loss)
+
+    def should_stop(self, eval_id):
+
+        """
+        Decides whether a trial should be stopped early.
+
+        Args:
+            eval_id (str): Evaluation ID of the trial
+
+        Returns:
+            bool: True if the trial should stop
+        """
+
+        with self._lock:
+            curve = self.curves.get(eval_id)
+            if not curve:
+                return False
+            step = max(curve)
+            return self._prune(eval_id, step, curve[step])
+
+    def _record(self, eval_id, step, loss):
+        pass
+
+    def _insert(self, sorted_losses, seen, eval_id, loss):
+        # Each trial counts once: a step reported again replaces its loss.
+        if eval_id in seen:
+            old = seen[eval_id]
+            del sorted_losses[bisect.bisect_left(sorted_losses, old)]
+        seen[eval_id] = loss
+        bisect.insort(sorted_losses, loss)
+
+    def _prune(self, eval_id, step, loss):
+        raise NotImplementedError
+
+
+class MedianPruner(Pruner):
+    def __init__(self, n_startup_trials=5, n_warmup_steps=0):
+
+        """
+        Stops a trial whose loss at a step is worse than the median loss
+        other trials reported at the same step. The losses seen at each
+        step, one per trial, are kept sorted, so the median is a lookup.
+
+        Args:
+            n_startup_trials (int): Number of other trials that must have
+                                    reached a step before pruning there
+            n_warmup_steps (int): Steps before which no trial is pruned
+        """
+
+        super().__init__()
+        self.n_startup_trials = n_startup_trials
+        self.n_warmup_steps = n_warmup_steps
+        self._steps = {}
+        self._seen = {}
+
+    def _record(self, eval_id, step, loss):
+        self._insert(self._steps.setdefault(step, []),
+                     self._seen.setdefault(step, {}), eval_id, loss)
+
+    def _prune(self, eval_id, step, loss):
+        if step < self.n_warmup_steps:
+            return False
+        losses = self._steps.get(step, [])
+        if len(losses) - 1 < self.n_startup_trials:
+            return False
+        return loss > losses[(len(losses) - 1) // 2]
+
+
+class SuccessiveHalvingPruner(Pruner):
+    def __init__(self, min_step=1, reduction_factor=3):
+
+        """
+        Asynchronous successive halving: rungs sit at steps
+        min_step * reduction_factor**k, and a trial that reaches a rung
+        keeps going only if its loss there is in the best
+        1/reduction_factor of the losses recorded at that rung so far.
+
+        Args:
+            min_step (int): Step of the first rung
+            reduction_factor (int): Fraction of trials kept at each rung is
+                                    1/reduction_factor
+        """
+
+        super().__init__()
+        self.min_step = min_step
+        self.reduction_factor = reduction_factor
+        self._rungs = {}
+        self._seen = {}
+
+    def _rung(self, step):
+        rung = self.min_step
+        while rung * self.reduction_factor <= step:
+            rung *= self.reduction_factor
+        return rung if step >= self.min_step else None
+
+    def _record(self, eval_id, step, loss):
+        rung = self._rung(step)
+        if rung is not None and step == rung:
+            self._insert(self._rungs.setdefault(rung, []),
+                         self._seen.setdefault(rung, {}), eval_id, loss)
+
+    def _prune(self, eval_id, step, loss):
+        rung = self._rung(step)
+        if rung is None:
+            return False
+        curve = self.curves[eval_id]
+        if rung not in curve:
+            return False
+        losses = self._rungs[rung]
+        n_keep = len(losses) // self.reduction_factor
+        if n_keep == 0:
+            return False
+        return curve[rung] > losses[n_keep - 1]
+
+
+class PrunerProxy:
+    def __init__(self, address, authkey):
+
+        """
+        Stands in for a Pruner in a worker process by forwarding report and
+        should_stop to the PrunerServer it was created by, so every trial
+        is judged against the curves of all workers.
+
+        Args:
+            address: Address the PrunerServer listens on
+            authkey (bytes): Key the PrunerServer authenticates with
+        """
+
+        self.address = address
+        self.authkey = authkey
+        self._conn = None
+
+    def __getstate__(self):
+        return {"address": self.address, "authkey": self.authkey}
+
+    def __setstate__(self, state):
+        self.__init__(state["address"], state["authkey"])
+
+    def _call(self, method, *args):
+        if self._conn is None:
+            self._conn = Client(self.address, authkey=self.authkey)
+        self._conn.send((method, args))
+        return self._conn.recv()
+
+    def report(self, eval_id, step, loss):
+        return self._call("report", eval_id, step, loss)
+
+    def should_stop(self, eval_id):
+        return self._call("should_stop", eval_id)
+
+
+class PrunerServer:
+    def __init__(self, pruner):
+
+        """
+        Serves a Pruner to worker processes from a background thread of the
+        process that owns it, e.g. for run(..., backend="process"). Hand
+        the workers proxy() instead of the pruner, and close the server,
+        or leave its with block, once they are done.
+
+        Args:
+            pruner (Pruner): The pruner to serve
+        """
+
+        self.pruner = pruner
+        self._authkey = os.urandom(16)
+        self._listener = Listener(authkey=self._authkey)
+        self._closed = False
+        self._thread = threading.Thread(target=self._serve, daemon=True)
+        self._thread.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        self.close()
+
+    def proxy(self):
+
+        """
+        Returns:
+            PrunerProxy: Picklable stand-in for the pruner
+        """
+
+        return PrunerProxy(self._listener.address, self._authkey)
+
+    def _serve(self):
+        while True:
+            try:
+                conn = self._listener.accept()
+            except OSError:
+                return
+            if self._closed:
+                conn.close()
+                return
+            threading.Thread(target=self._handle, args=(conn,),
+                             daemon=True).start()
+
+    def _handle(self, conn):
+        with conn:
+            while True:
+                try:
+                    method, args = conn.recv()
+                except (EOFError, OSError):
+                    return
+                if method not in ("report", "should_stop"):
+                    conn.send(None)
+                    continue
+                conn.send(getattr(self.pruner, method)(*args))
+
+    def close(self):
+
+        """
+        Stops accepting new workers.
+        """
+
+        if self._closed:
+            return
+        self._closed = True
+        # accept() does not return when the listener is closed from
+        # another thread, so wake it with a connection of our own.
+        try:
+            Client(self._listener.address, authkey=self._authkey).close()
+        except OSError:
+            pass
+        self._thread.join()
+        self._listener.close()
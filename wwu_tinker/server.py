@@ -0,0 +1,239 @@
+import argparse
+import asyncio
+import itertools
+import json
+import sqlite3
+import time
+
+from aiohttp import web
+
+from .local import ENDPOINTS, LocalClient
+from .optimizers import make_optimizer
+
+
+class SQLiteBackend(LocalClient):
+    def __init__(self, path, seed=None, clock=time.time,
+                 optimizer_factory=make_optimizer):
+
+        """
+        LocalClient whose experiments and evaluations are also written
+        through to SQLite, so a server restart picks up where it left off.
+        Requests are answered from memory; each one costs a single commit.
+        Every ask and tell made of an optimizer is logged, and on startup
+        every experiment's optimizer is rebuilt and the log replayed in
+        order, so a seeded optimizer carries on exactly where it stopped
+        instead of handing out its first configurations again. Databases
+        written before the log existed are told their completed
+        evaluations in the order they were reported.
+
+        Args:
+            path (str): SQLite database file, created if missing
+            seed (int): Seed for the optimizers of every experiment
+            clock (callable): Returns the current time in seconds; used to
+                              expire leases
+            optimizer_factory (callable): Builds the optimizer of a new
+                                          experiment, called like
+                                          optimizers.make_optimizer
+        """
+
+        super().__init__(seed=seed, clock=clock,
+                         optimizer_factory=optimizer_factory)
+        self.path = path
+        self._seq = {}
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute("CREATE TABLE IF NOT EXISTS experiments ("
+                         "expt_id TEXT PRIMARY KEY, data TEXT)")
+        self._db.execute("CREATE TABLE IF NOT EXISTS evaluations ("
+                         "eval_id INTEGER PRIMARY KEY, expt_id TEXT, "
+                         "data TEXT, seq INTEGER)")
+        self._db.execute("CREATE TABLE IF NOT EXISTS optimizer_log ("
+                         "expt_id TEXT, op TEXT, arg INTEGER)")
+        self._db.commit()
+        self._load()
+
+    def _load(self):
+        max_expt = 0
+        for expt_id, data in self._db.execute(
+                "SELECT expt_id, data FROM experiments"):
+            self._add_experiment(expt_id, json.loads(data))
+            max_expt = max(max_expt, int(expt_id))
+        max_eval = 0
+        for eval_id, expt_id, data, seq in self._db.execute(
+                "SELECT eval_id, expt_id, data, seq FROM evaluations "
+                "ORDER BY seq IS NULL, seq, eval_id"):
+            expt = self.experiments[expt_id]
+            evaluation = json.loads(data)
+            expt["evaluations"][eval_id] = evaluation
+            if seq is not None:
+                self._seq[eval_id] = seq
+                expt["completed"].append(evaluation)
+            max_eval = max(max_eval, eval_id)
+        self._expt_ids = itertools.count(max_expt + 1)
+        self._eval_ids = itertools.count(max_eval + 1)
+        replayed = set()
+        for expt_id, op, arg in self._db.execute(
+                "SELECT expt_id, op, arg FROM optimizer_log ORDER BY rowid"):
+            expt = self.experiments[expt_id]
+            replayed.add(expt_id)
+            if op == "ask":
+                expt["optimizer"].ask(arg)
+            else:
+                super()._tell(expt, expt["evaluations"][arg])
+        for expt_id, expt in self.experiments.items():
+            if expt_id not in replayed:
+                for evaluation in expt["completed"]:
+                    self._tell(expt, evaluation)
+        self._db.commit()
+
+    def _log(self, expt, op, arg):
+        self._db.execute("INSERT INTO optimizer_log VALUES (?, ?, ?)",
+                         (expt["expt_id"], op, arg))
+
+    def _save(self, evaluation, seq=None):
+        self._db.execute("INSERT OR REPLACE INTO evaluations VALUES (?, ?, ?, ?)",
+                         (evaluation["eval_id"], evaluation["expt_id"],
+                          json.dumps(evaluation), seq))
+
+    def request(self, endpoint, payload):
+        response = super().request(endpoint, payload)
+        with self._lock:
+            self._db.commit()
+        return response
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+    def _setup(self, payload):
+        response = super()._setup(payload)
+        self._db.execute("INSERT INTO experiments VALUES (?, ?)",
+                         (response["expt_id"], json.dumps(payload)))
+        return response
+
+    def _issue(self, evaluation, payload):
+        issued = super()._issue(evaluation, payload)
+        self._save(evaluation)
+        return issued
+
+    def _ask(self, expt, n):
+        if n > 0:
+            self._log(expt, "ask", n)
+        return super()._ask(expt, n)
+
+    def _tell(self, expt, evaluation):
+        self._log(expt, "tell", evaluation["eval_id"])
+        super()._tell(expt, evaluation)
+
+    def _heartbeat(self, payload):
+        response = super()._heartbeat(payload)
+        evaluation = self._experiment(payload)["evaluations"][payload["eval_id"]]
+        if "result" not in evaluation:
+            self._save(evaluation)
+        return response
+
+    def _report(self, payload):
+        response = super()._report(payload)
+        self._save_completed(payload)
+        return response
+
+    def _report_config(self, payload):
+        response = super()._report_config(payload)
+        payload = dict(payload, eval_id=response["eval_id"])
+        self._save_completed(payload)
+        return response
+
+    def _save_completed(self, payload):
+        expt = self._experiment(payload)
+        evaluation = expt["evaluations"][payload["eval_id"]]
+        if evaluation["eval_id"] not in self._seq:
+            self._seq[evaluation["eval_id"]] = len(expt["completed"])
+        self._save(evaluation, seq=self._seq[evaluation["eval_id"]])
+
+
+def make_app(backend):
+
+    """
+    Builds an aiohttp application that serves the tinker endpoints with
+    the same JSON shapes as the hosted server. Requests are handed to
+    backend on the event loop's thread pool, so slow optimizer steps
+    never block other connections. Every response carries the seconds
+    the backend spent on it in an X-Tinker-Server-Time header. Lists are
+    streamed as newline-delimited JSON to clients that accept it.
+
+    Args:
+        backend (LocalClient): Answers the requests, e.g. an SQLiteBackend
+
+    Returns:
+        aiohttp.web.Application: The application
+    """
+
+    def timed_request(endpoint, payload):
+        start = time.perf_counter()
+        response = backend.request(endpoint, payload)
+        return response, time.perf_counter() - start
+
+    async def handle(request):
+        endpoint = request.match_info["endpoint"]
+        try:
+            payload = await request.json()
+        except ValueError:
+            return web.json_response({"error": "body must be JSON"}, status=400)
+        try:
+            response, seconds = await asyncio.get_running_loop().run_in_executor(
+                None, timed_request, endpoint, payload)
+        except (KeyError, ValueError, TypeError) as e:
+            return web.json_response({"error": repr(e)}, status=400)
+        headers = {"X-Tinker-Server-Time": "%.6f" % seconds}
+        if (isinstance(response, list)
+                and "application/x-ndjson" in request.headers.get("Accept", "")):
+            return await stream_ndjson(request, response, headers)
+        return web.json_response(response, headers=headers)
+
+    async def stream_ndjson(request, elements, headers):
+        stream = web.StreamResponse(headers=headers)
+        stream.content_type = "application/x-ndjson"
+        await stream.prepare(request)
+        for start in range(0, len(elements), 1000):
+            await stream.write("".join(json.dumps(e) + "\n"
+                                       for e in elements[start:start + 1000]).encode())
+        await stream.write_eof()
+        return stream
+
+    async def close_backend(app):
+        backend.close()
+
+    app = web.Application()
+    for endpoint in ENDPOINTS:
+        app.router.add_post("/{endpoint:%s}" % endpoint, handle)
+    app.on_cleanup.append(close_backend)
+    return app
+
+
+def main(argv=None):
+
+    """
+    Runs a local tinker server:
+
+        python -m wwu_tinker.server --port 6060 --db tinker.db
+
+    and point an Experiment at it with server="http://localhost:6060/".
+    """
+
+    parser = argparse.ArgumentParser(description="Local tinker server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=6060)
+    parser.add_argument("--db", default="tinker.db",
+                        help="SQLite database file")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--backlog", type=int, default=4096,
+                        help="Maximum number of pending connections")
+    args = parser.parse_args(argv)
+
+    web.run_app(make_app(SQLiteBackend(args.db, seed=args.seed)),
+                host=args.host, port=args.port, backlog=args.backlog)
+
+
+if __name__ == "__main__":
+    main()
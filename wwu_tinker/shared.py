@@ -0,0 +1,143 @@
+import fcntl
+import json
+import os
+import time
+
+from .local import LocalClient
+from .optimizers import make_optimizer
+
+READ_ONLY = ("request_history", "request_best_eval")
+
+
+class FileClient(LocalClient):
+    def __init__(self, path, seed=None, clock=time.time,
+                 optimizer_factory=make_optimizer):
+
+        """
+        LocalClient whose state is shared through a directory, e.g. on a
+        network filesystem, so the same script can run on many nodes
+        without a tinker server:
+
+            expt = Experiment("sweep", client=FileClient("/shared/sweep"))
+            expt.submit()
+            expt.run(objective, n_trials=1000)
+
+        Every state-changing request is appended to a log in the directory
+        while holding an exclusive lock on it. Before answering, each node
+        replays the entries other nodes appended since it last looked, so
+        every node rebuilds the same optimizer state from the same seed.
+        Requests are therefore serialized across nodes and every
+        configuration is handed out to exactly one of them.
+
+        Nodes that submit the same experiment (same name, variables and
+        optimizer) attach to the one created first instead of creating
+        duplicates; use a new name or directory for a fresh experiment.
+
+        The lock is an fcntl lock, which NFS supports through its lock
+        manager. Only the lock is held while optimizing, so throughput
+        scales with nodes as long as the objective dominates; raise
+        order_size to take the lock less often.
+
+        Args:
+            path (str): Shared directory, created if missing
+            seed (int): Seed for the optimizers. The first node to open the
+                        directory stores it (or a random one if None) and
+                        every later node uses the stored seed.
+            clock (callable): Returns the current time in seconds; used to
+                              expire leases
+            optimizer_factory (callable): Builds the optimizer of a new
+                                          experiment, called like
+                                          optimizers.make_optimizer. Must be
+                                          the same on every node.
+        """
+
+        super().__init__(seed=seed, clock=self._entry_time,
+                         optimizer_factory=optimizer_factory)
+        self.path = path
+        self._wall_clock = clock
+        self._time = None
+        self._offset = 0
+        os.makedirs(path, exist_ok=True)
+        self._log_path = os.path.join(path, "log.jsonl")
+        self._lock_file = open(os.path.join(path, "lock"), "a+")
+        self._lock_path()
+        try:
+            self.seed = self._load_seed(seed)
+        finally:
+            self._unlock_path()
+
+    def _entry_time(self):
+        return self._time
+
+    def _lock_path(self):
+        fcntl.lockf(self._lock_file, fcntl.LOCK_EX)
+
+    def _unlock_path(self):
+        fcntl.lockf(self._lock_file, fcntl.LOCK_UN)
+
+    def _load_seed(self, seed):
+        meta_path = os.path.join(self.path, "meta.json")
+        if os.path.exists(meta_path):
+            with open(meta_path, "r") as f:
+                stored = json.load(f)["seed"]
+            if seed is not None and seed != stored:
+                print("Warning: %s was created with seed %s, ignoring seed %s"
+                      % (self.path, stored, seed))
+            return stored
+        if seed is None:
+            seed = int.from_bytes(os.urandom(4), "little")
+        tmp_path = "%s.%d.tmp" % (meta_path, os.getpid())
+        with open(tmp_path, "w") as f:
+            json.dump({"seed": seed}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, meta_path)
+        return seed
+
+    def _catch_up(self):
+        if not os.path.exists(self._log_path):
+            return
+        with open(self._log_path, "rb") as f:
+            f.seek(self._offset)
+            data = f.read()
+        end = data.rfind(b"\n") + 1
+        for line in data[:end].splitlines():
+            entry = json.loads(line)
+            self._time = entry["time"]
+            getattr(self, "_" + entry["endpoint"])(entry["payload"])
+        self._offset += end
+
+    def _append(self, endpoint, payload):
+        line = (json.dumps({"time": self._time, "endpoint": endpoint,
+                            "payload": payload}) + "\n").encode()
+        with open(self._log_path, "ab") as f:
+            f.write(line)
+            f.flush()
+            os.fsync(f.fileno())
+        self._offset += len(line)
+
+    def _find_experiment(self, payload):
+        for expt_id, expt in self.experiments.items():
+            if expt["data"] == payload:
+                return expt_id
+        return None
+
+    def _handle(self, endpoint, payload):
+        self._lock_path()
+        try:
+            self._catch_up()
+            if endpoint == "setup":
+                expt_id = self._find_experiment(payload)
+                if expt_id is not None:
+                    return {"expt_id": expt_id}
+            self._time = self._wall_clock()
+            response = getattr(self, "_" + endpoint)(payload)
+            if endpoint not in READ_ONLY:
+                self._append(endpoint, payload)
+            return response
+        finally:
+            self._unlock_path()
+
+    def close(self):
+        with self._lock:
+            self._lock_file.close()
@@ -0,0 +1,326 @@
+import math
+import operator
+
+import numpy as np
+
+
+class SearchSpace:
+    def __init__(self, variables, default_levels=10):
+
+        """
+        Compiled form of an experiment's variables. The variable JSON is
+        walked once to build per-dimension bounds, steps, level counts,
+        linear or log transforms and enum lookup tables, so that encoding
+        configurations to the unit hypercube and decoding points back are
+        array operations over all configurations at once.
+
+        Dimensions follow the sorted variable names. In the unit hypercube
+        continuous floats (no step_size) are scaled linearly, or by their
+        logarithm if log_scale is set; ints, stepped floats and enums are
+        cut into one equal cell per level.
+
+        A variable with a parent is only active when its parent is active
+        and takes one of its parent_values. Inactive variables are left out
+        of decoded configurations, and sit in the middle of their dimension
+        when a configuration without them is encoded.
+
+        Args:
+            variables (dict or list): Maps variable names to their JSON,
+                                      i.e. Experiment.data["vars"], or a
+                                      list of Variable objects
+            default_levels (int): Number of evenly spaced levels a
+                                  continuous float gets when it has to be
+                                  discretized, e.g. by Grid
+        """
+
+        if isinstance(variables, (list, tuple)):
+            variables = {var.name: var.to_dict() for var in variables}
+        self.variables = variables
+        self.names = sorted(variables)
+        self.index = {name: j for j, name in enumerate(self.names)}
+        self.types = [variables[name]["type"] for name in self.names]
+        self.choices = {}
+        self.codes = {}
+        self.conditions = {name: (variables[name]["parent"],
+                                  variables[name]["parent_values"])
+                           for name in self.names if "parent" in variables[name]}
+        self.conditional = self._conditional_order()
+
+        d = len(self.names)
+        self.lower = np.full(d, np.nan)
+        self.upper = np.full(d, np.nan)
+        self.steps = np.zeros(d)
+        self.levels = np.zeros(d, dtype=np.int64)
+        self.continuous = np.zeros(d, dtype=bool)
+        self.log = np.zeros(d, dtype=bool)
+        self._ranges = [None] * d
+        for j, name in enumerate(self.names):
+            var = variables[name]
+            if var["type"] == "enum":
+                self.choices[name] = list(var["values"])
+                self.codes[name] = {v: i for i, v in enumerate(var["values"])}
+                self.lower[j], self.upper[j] = 0, len(var["values"]) - 1
+                self.levels[j] = len(var["values"])
+                continue
+            self.continuous[j] = (var["type"] == "float"
+                                  and var.get("step_size") is None)
+            if "range" not in var:
+                continue
+            lo, hi = var["range"]
+            self._ranges[j] = (lo, hi)
+            self.lower[j], self.upper[j] = lo, hi
+            self.log[j] = self.continuous[j] and bool(var.get("log_scale"))
+            if self.continuous[j]:
+                self.levels[j] = default_levels
+            else:
+                self.steps[j] = var.get("step_size") or 1
+                self.levels[j] = int(np.floor((hi - lo) / self.steps[j] + 1e-9)) + 1
+
+        # Continuous dimensions map u in [0, 1) to lower + u * span, or to
+        # lower * exp(u * span) for log-scaled ones.
+        with np.errstate(divide="ignore", invalid="ignore"):
+            self._span = np.where(self.log, np.log(self.upper / self.lower),
+                                  self.upper - self.lower)
+        self._divisor = np.where(self._span == 0, 1.0, self._span)
+        self._cont = np.flatnonzero(self.continuous)
+        self._disc = np.flatnonzero(~self.continuous)
+        self._getter = operator.itemgetter(*self.names) if d else None
+        self.n_features = int(sum(self.levels[j] if t == "enum" else 1
+                                  for j, t in enumerate(self.types)))
+
+    def __len__(self):
+        return len(self.names)
+
+    def _conditional_order(self):
+        order = []
+        resolved = set(self.names) - set(self.conditions)
+        pending = sorted(self.conditions)
+        while pending:
+            ready = [name for name in pending
+                     if self.conditions[name][0] in resolved]
+            if not ready:
+                raise ValueError("conditional variables %s have a missing or "
+                                 "circular parent" % pending)
+            order.extend(ready)
+            resolved.update(ready)
+            pending = [name for name in pending if name not in resolved]
+        return order
+
+    def _drop_inactive(self, configs, columns):
+        active = {}
+        for name in self.conditional:
+            parent, parent_values = self.conditions[name]
+            mask = [value in parent_values
+                    for value in columns[self.index[parent]]]
+            if parent in active:
+                mask = [a and b for a, b in zip(mask, active[parent])]
+            active[name] = mask
+            for config, on in zip(configs, mask):
+                if not on:
+                    del config[name]
+        return configs
+
+    def branches(self):
+
+        """
+        Splits a conditional space into flat spaces, one per combination
+        of active variables, so a grid can walk each branch without
+        repeating configurations that only differ in inactive variables.
+        Within a branch a parent is an enum of the levels that lead to it.
+
+        Returns:
+            list: SearchSpace objects without conditional variables; just
+                  [self] if there are none
+        """
+
+        if not self.conditions:
+            return [self]
+        parent = next(self.conditions[name][0] for name in self.conditional
+                      if self.conditions[name][0] not in self.conditions)
+        children = [name for name in self.conditional
+                    if self.conditions[name][0] == parent]
+        levels = self.values(parent, np.arange(self.levels[self.index[parent]]))
+        groups = {}
+        for value in levels:
+            key = tuple(value in self.conditions[child][1] for child in children)
+            groups.setdefault(key, []).append(value)
+
+        branches = []
+        for key, values in groups.items():
+            variables = dict(self.variables)
+            variables[parent] = {"type": "enum", "values": values}
+            for child, on in zip(children, key):
+                if on:
+                    variables[child] = {k: v for k, v in variables[child].items()
+                                        if k not in ("parent", "parent_values")}
+                else:
+                    del variables[child]
+            while True:
+                orphans = [name for name, var in variables.items()
+                           if var.get("parent", name) not in variables]
+                if not orphans:
+                    break
+                for name in orphans:
+                    del variables[name]
+            branches.extend(SearchSpace(variables).branches())
+        return branches
+
+    def size(self):
+
+        """
+        Returns:
+            int: Number of points of the grid over every variable's levels
+        """
+
+        return math.prod(self.levels.tolist())
+
+    def values(self, name, index):
+
+        """
+        Looks up the values of a variable at the given level indices.
+
+        Args:
+            name (str): Name of the variable
+            index (ndarray): Integer level indices in [0, levels)
+
+        Returns:
+            list: Native Python values, one per index
+        """
+
+        j = self.index[name]
+        if self.types[j] == "enum":
+            choices = self.choices[name]
+            return [choices[i] for i in index.tolist()]
+        lo, hi = self._ranges[j]
+        if self.continuous[j]:
+            gaps = max(int(self.levels[j]) - 1, 1)
+            if self.log[j]:
+                return (lo * np.exp(self._span[j] / gaps * index)).tolist()
+            return (lo + (hi - lo) / gaps * index).tolist()
+        step = self.variables[name].get("step_size") or 1
+        return (lo + step * index).tolist()
+
+    def decode(self, u):
+
+        """
+        Maps points of the unit hypercube to configurations. Continuous
+        floats go through their linear or log transform; the other
+        variables take the level of the cell each point falls in.
+
+        Args:
+            u (ndarray): Array of shape (n, len(self)) in [0, 1)
+
+        Returns:
+            list: One config dict per row of u
+        """
+
+        columns = [None] * len(self.names)
+        if len(self._cont):
+            scaled = u[:, self._cont] * self._span[self._cont]
+            log = self.log[self._cont]
+            scaled[:, log] = np.exp(scaled[:, log]) * self.lower[self._cont][log]
+            scaled[:, ~log] += self.lower[self._cont][~log]
+            for k, j in enumerate(self._cont):
+                columns[j] = scaled[:, k].tolist()
+        if len(self._disc):
+            levels = self.levels[self._disc]
+            index = np.minimum((u[:, self._disc] * levels).astype(np.int64),
+                               levels - 1)
+            for k, j in enumerate(self._disc):
+                columns[j] = self.values(self.names[j], index[:, k])
+        configs = [dict(zip(self.names, row)) for row in zip(*columns)]
+        if self.conditional:
+            self._drop_inactive(configs, columns)
+        return configs
+
+    def encode(self, configs):
+
+        """
+        Maps configurations to the unit hypercube. Discrete values land in
+        the middle of their cell, so decode(encode(configs)) == configs.
+
+        Args:
+            configs (list): Config dicts mapping variable names to values
+
+        Returns:
+            ndarray: Array of shape (len(configs), len(self))
+        """
+
+        u = np.empty((len(configs), len(self.names)))
+        if not configs or not self.names:
+            return u
+        if self.conditional:
+            rows = [tuple(config.get(name) for name in self.names)
+                    for config in configs]
+        else:
+            rows = [self._getter(config) for config in configs]
+        columns = zip(*rows) if len(self.names) > 1 else [rows]
+        for j, column in enumerate(columns):
+            name = self.names[j]
+            inactive = None
+            if name in self.conditions:
+                inactive = np.array([value is None for value in column])
+                fill = self.choices[name][0] if name in self.codes else self.lower[j]
+                column = [fill if value is None else value for value in column]
+            if name in self.codes:
+                codes = self.codes[name]
+                index = np.fromiter((codes[v] for v in column), np.int64,
+                                    len(configs))
+                u[:, j] = (index + 0.5) / self.levels[j]
+            else:
+                u[:, j] = self._encode_numeric(j, np.asarray(column, dtype=float))
+            if inactive is not None:
+                u[inactive, j] = 0.5
+        return u
+
+    def _encode_numeric(self, j, x):
+        if not self.continuous[j]:
+            index = np.rint((x - self.lower[j]) / self.steps[j])
+            return (index + 0.5) / self.levels[j]
+        if self.log[j]:
+            return np.log(x / self.lower[j]) / self._divisor[j]
+        return (x - self.lower[j]) / self._divisor[j]
+
+    def snap(self, u):
+
+        """
+        Moves points of the unit hypercube to the middle of the cell of
+        the discrete value they decode to, leaving continuous floats alone.
+
+        Args:
+            u (ndarray): Array of shape (n, len(self)) in [0, 1)
+
+        Returns:
+            ndarray: Snapped copy of u
+        """
+
+        u = u.copy()
+        levels = self.levels[self._disc]
+        u[:, self._disc] = (np.minimum(np.floor(u[:, self._disc] * levels),
+                                       levels - 1) + 0.5) / levels
+        return u
+
+    def features(self, u):
+
+        """
+        Turns points of the unit hypercube into model features: enums are
+        one-hot encoded, every other variable keeps its coordinate.
+
+        Args:
+            u (ndarray): Array of shape (n, len(self)) in [0, 1)
+
+        Returns:
+            ndarray: Array of shape (n, self.n_features)
+        """
+
+        columns = []
+        for j, name in enumerate(self.names):
+            if name in self.codes:
+                count = self.levels[j]
+                index = np.minimum((u[:, j] * count).astype(np.int64), count - 1)
+                columns.append(np.eye(count)[index])
+            else:
+                columns.append(u[:, j:j + 1])
+        if not columns:
+            return np.empty((len(u), 0))
+        return np.hstack(columns)
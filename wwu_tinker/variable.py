@@ -6,7 +6,8 @@ class Variable:
     var_names = set()
 
     # TODO: Add client side validation that step_size is filled in if gridsearch is selected as optimizer
-    def __init__(self, name, v_type, v_range=None, values=None, step_size=None):
+    def __init__(self, name, v_type, v_range=None, values=None, step_size=None,
+                 log_scale=False, parent=None, parent_values=None):
 
         """
         Creates a new variable object to be inserted into an Experiment.
@@ -17,17 +18,30 @@ class Variable:
             v_range (list/tuple): A min and max range to test (only for int/float Variables)
             values (list): The list of possible enum values (only for enum Variables)
             step_size(int or float): the preferred step size for use with grid search
+            log_scale (bool): Search a float Variable uniformly in the logarithm
+                              of its range, e.g. for learning rates. The range
+                              must be positive.
+            parent (str): Name of the variable this one depends on. The
+                          Variable is only active, i.e. sampled and present
+                          in configurations, when parent is active and takes
+                          one of parent_values.
+            parent_values (list): Values of parent that activate this Variable
         """
 
-        if Variable.__validate(name, v_type, v_range, values, step_size):
+        if Variable.__validate(name, v_type, v_range, values, step_size,
+                               log_scale, parent, parent_values):
             self._name = name
             self._type = v_type
             self._range = v_range
             self._values = values
             self._step_size = step_size
+            self._log_scale = log_scale
+            self._parent = parent
+            self._parent_values = parent_values
 
     @staticmethod
-    def __validate(name, v_type, v_range=None, values=None, step_size=None):
+    def __validate(name, v_type, v_range=None, values=None, step_size=None,
+                   log_scale=False, parent=None, parent_values=None):
 
         """
         Checks that the provided fields can create a valid Variable.
@@ -37,6 +51,9 @@ class Variable:
             v_type (str): Type of variable. (int, float, or enum)
             v_range (list/tuple): A min and max range to test (only for int/float Variables)
             values (list): The list of possible enum values (only for enum Variables)
+            log_scale (bool): Whether a float Variable is searched in log space
+            parent (str): Name of the variable this one depends on
+            parent_values (list): Values of parent that activate this Variable
         Returns:
             bool: True if the provided parameters are valid, false otherwise
         """
@@ -46,6 +63,15 @@ class Variable:
             return False
         else:
             Variable.var_names.add(name)
+        if (parent is None) != (parent_values is None):
+            print("Error: parent and parent_values must be given together")
+            return False
+        elif parent_values is not None and not isinstance(parent_values, list):
+            print("Error: parent_values must be a list of values of the parent")
+            return False
+        elif parent == name:
+            print("Error: a variable cannot be its own parent")
+            return False
         if v_type == "int" or v_type == "float":
             if v_range is None:
                 print("Error: must provide a range for variable type \"%s\"" % v_type)
@@ -70,11 +96,20 @@ class Variable:
                 elif step_size != None and not isinstance(step_size, float):
                     print("Error: elements in v_range must match v_type")
                     return False
+            if log_scale and (v_type != "float" or step_size is not None
+                              or v_range[0] <= 0):
+                print("Error: log_scale needs a float variable with a positive "
+                      "range and no step_size")
+                return False
             return True
         elif v_type == "enum":
             if values is None:
                 print("Error: must provide a set of values for variable type enum!")
                 return False
+            elif log_scale:
+                print("Error: log_scale needs a float variable with a positive "
+                      "range and no step_size")
+                return False
             else:
                 return True
         else:
@@ -99,4 +134,40 @@ class Variable:
 
     @property
     def step_size(self):
-        return self._step_size
\ No newline at end of file
+        return self._step_size
+
+    @property
+    def log_scale(self):
+        return self._log_scale
+
+    @property
+    def parent(self):
+        return self._parent
+
+    @property
+    def parent_values(self):
+        return self._parent_values
+
+    def to_dict(self):
+
+        """
+        Builds the JSON of this Variable as it is sent to the server.
+
+        Returns:
+            dict: The variable's type, its range, step_size and
+                  log_scale or its enum values, and its parent if it has one
+        """
+
+        var_dict = {"type": self.type}
+        if self.type == "int" or self.type == "float":
+            var_dict["range"] = self.range
+            if self.step_size is not None:
+                var_dict["step_size"] = self.step_size
+            if self.log_scale:
+                var_dict["log_scale"] = True
+        else:
+            var_dict["values"] = self.values
+        if self.parent is not None:
+            var_dict["parent"] = self.parent
+            var_dict["parent_values"] = self.parent_values
+        return var_dict